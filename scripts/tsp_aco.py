@@ -3,28 +3,110 @@ Travelling Salesman Problem - Ant Colony Optimization (No Library)
 Giải bài toán người du lịch bằng thuật toán tối ưu hóa đàn kiến
 """
 
+import multiprocessing
+import threading
 import time
-import random
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Tuple
 
+import numpy as np
+
+import tsp_distance
+from tsp_heuristics import local_search
+from tsp_trace import (EVENT_IMPROVEMENT, EVENT_ITERATION, TRACE_ALL, TraceBuffer, TraceSteps,
+                       parse_trace_level)
+
+ENGINES = ('python', 'numpy', 'batched')
+# Bay hơi được dồn vào một hệ số nhân chung; giá trị lưu trữ tỉ lệ với
+# 1 / hệ số nên hệ số được nhân hẳn vào ma trận khi nhỏ hơn ngưỡng này, hoặc
+# sớm hơn khi hệ số mũ alpha nhỏ hơn PHEROMONE_POWER_RENORMALIZE (giữ
+# pheromone ** alpha trong khoảng của float)
+PHEROMONE_RENORMALIZE = 1e-30
+PHEROMONE_POWER_RENORMALIZE = 1e-250
+# None: không tìm kiếm cục bộ, 'all': cải thiện tuyến của mọi con kiến,
+# 'best': chỉ tuyến tốt nhất của mỗi iteration
+LOCAL_SEARCH_MODES = (None, 'all', 'best')
+LOCAL_SEARCH_NEIGHBORS = 10
+# Ngưỡng lambda của hệ số phân nhánh: cạnh được tính khi pheromone của nó lớn
+# hơn min + lambda * (max - min) trên cùng hàng
+BRANCHING_LAMBDA = 0.05
+# 'as': Ant System (mọi con kiến cộng pheromone), 'mmas': MAX-MIN Ant System,
+# 'acs': Ant Colony System
+VARIANTS = ('as', 'mmas', 'acs')
+# MMAS dùng tuyến tốt nhất toàn cục thay cho tuyến tốt nhất của iteration mỗi chừng này iteration
+MMAS_GLOBAL_BEST_INTERVAL = 10
+
+
 class TSP_ACO:
     def __init__(self, cities: List[str], distance_matrix,
                  n_ants: int = 20, n_iterations: int = 50,
                  alpha: float = 1.0, beta: float = 2.0,
-                 evaporation_rate: float = 0.5, q: float = 100):
+                 evaporation_rate: float = 0.5, q: float = 100,
+                 trace: str = 'improvements', engine: str = 'python',
+                 candidates: int = None, local_search: str = None,
+                 variant: str = 'as', q0: float = 0.9, local_evaporation: float = 0.1,
+                 p_best: float = 0.05, seed: int = None, rng: np.random.Generator = None,
+                 initial_pheromone=None, initial_route: List[int] = None):
         """
         Khởi tạo thuật toán ACO cho TSP
         
         Args:
             cities: Danh sách tên các thành phố
-            distance_matrix: Ma trận khoảng cách giữa các thành phố
+            distance_matrix: Ma trận khoảng cách giữa các thành phố (list lồng
+                nhau, ndarray, tsp_distance.CondensedDistanceMatrix hoặc
+                tsp_distance.DistanceOracle - với candidates, pheromone, heuristic
+                và danh sách láng giềng chỉ cần O(n·k) bộ nhớ). Với
+                tsp_distance.SharedArray, các đảo dùng chung một bản trong bộ nhớ.
             n_ants: Số lượng kiến
             n_iterations: Số lần lặp
             alpha: Trọng số pheromone
             beta: Trọng số heuristic (khoảng cách)
             evaporation_rate: Tỷ lệ bay hơi pheromone
             q: Hằng số cập nhật pheromone
+            trace: Mức ghi vết - 'off', 'improvements' (khi tìm được tuyến
+                tốt hơn) hoặc 'all' (thêm kết quả từng iteration)
+            engine: 'python' (danh sách lồng nhau), 'numpy' (pheromone và
+                heuristic là ndarray, ma trận lựa chọn tính một lần mỗi iteration)
+                hoặc 'batched' (như 'numpy', cả đàn kiến đi cùng lúc từng bước)
+            candidates: Số láng giềng gần nhất k của mỗi thành phố mà kiến được
+                chọn (None: mọi thành phố); khi hết láng giềng chưa thăm thì đi
+                tới thành phố chưa thăm gần nhất. Pheromone và heuristic chỉ lưu
+                n×k giá trị. Cần engine 'numpy' hoặc 'batched'. Có thể truyền
+                thẳng mảng n×k danh sách ứng viên đã lưu (ndarray, memmap hoặc
+                tsp_distance.SharedArray), khi đó k là số cột.
+            local_search: Cải thiện tuyến bằng 2-opt và Or-opt trên danh sách
+                láng giềng - None, 'all' (mọi con kiến) hoặc 'best' (tuyến tốt
+                nhất của iteration); giả định khoảng cách đối xứng
+            variant: 'as' (Ant System), 'mmas' (chỉ tuyến tốt nhất cộng
+                pheromone, pheromone bị chặn trong [tau_min, tau_max]) hoặc 'acs'
+                (quy tắc giả ngẫu nhiên tỉ lệ và cập nhật pheromone cục bộ)
+            q0: ACS - xác suất đi tới thành phố có trọng số lớn nhất thay vì rút ngẫu nhiên
+            local_evaporation: ACS - tỷ lệ bay hơi cục bộ trên cạnh vừa đi qua
+            p_best: MMAS - xác suất xây dựng lại tuyến tốt nhất khi hội tụ, dùng tính tau_min
+            seed: Seed của bộ sinh số ngẫu nhiên riêng (None: ngẫu nhiên), để chạy lặp lại được
+            rng: numpy.random.Generator dùng thay cho seed
+            initial_pheromone: Pheromone ban đầu (giá trị thực) để khởi động ấm,
+                ma trận n×n hoặc n×k theo candidate_lists; phần tử NaN giữ giá
+                trị mặc định
+            initial_route: Tuyến tốt nhất có sẵn (hoán vị index thành phố), dùng
+                làm nghiệm tốt nhất ban đầu; khi không có initial_pheromone thì
+                cộng thêm pheromone trên các cạnh của nó
         """
+        if engine not in ENGINES:
+            raise ValueError(f"engine phải là một trong {ENGINES}, nhận được {engine!r}")
+        candidate_source = None
+        if candidates is not None and np.ndim(candidates) == 2:
+            candidate_source = candidates
+            if len(candidate_source) != len(cities):
+                raise ValueError("candidates dạng mảng phải có một hàng cho mỗi thành phố")
+            candidates = np.shape(candidate_source)[1]
+        if candidates is not None and (engine == 'python' or candidates < 1):
+            raise ValueError("candidates phải là số nguyên dương và cần engine 'numpy' hoặc 'batched'")
+        if local_search not in LOCAL_SEARCH_MODES:
+            raise ValueError(f"local_search phải là một trong {LOCAL_SEARCH_MODES}, "
+                             f"nhận được {local_search!r}")
+        if variant not in VARIANTS:
+            raise ValueError(f"variant phải là một trong {VARIANTS}, nhận được {variant!r}")
         self.cities = cities
         self.distance_matrix = distance_matrix
         self.n_cities = len(cities)
@@ -34,30 +116,310 @@ class TSP_ACO:
         self.beta = beta
         self.evaporation_rate = evaporation_rate
         self.q = q
-        
-    
-        self.pheromone = [[1.0 for _ in range(self.n_cities)] for _ in range(self.n_cities)]
-        
-      
-        self.heuristic = [[0.0 for _ in range(self.n_cities)] for _ in range(self.n_cities)]
-        for i in range(self.n_cities):
-            for j in range(self.n_cities):
-                if i != j and distance_matrix[i][j] > 0:
-                    self.heuristic[i][j] = 1.0 / distance_matrix[i][j]
+        self.trace_level = parse_trace_level(trace)
+        self.engine = engine
+        self.candidates = candidates
+        self._candidate_source = candidate_source
+        self.local_search = local_search
+        self.variant = variant
+        self.q0 = q0
+        self.local_evaporation = local_evaporation
+        self.p_best = p_best
+        self.seed = seed
+        self.rng = rng if rng is not None else np.random.default_rng(seed)
+        # Lấy một số ngẫu nhiên đều trong [0, 1); construct_colony thay bằng
+        # dãy số rút sẵn một lần cho cả iteration
+        self._draw = self.rng.random
+        self.timings = {'construction': 0.0, 'local_search': 0.0, 'pheromone': 0.0}
+        self.iterations_run = 0
+        self.restarts = 0
+        self.stop_reason = None
+        self._limits = {}
+        self._stop_event = None
         
         self.best_route = None
         self.best_distance = float('inf')
         self.execution_time = 0
         self.convergence_data = []
-        self.steps_log = []
+        self.trace = TraceBuffer()
+        # Pheromone thực = self.pheromone * self._pheromone_scale
+        self._pheromone_scale = 1.0
+        self._renormalize_below = PHEROMONE_RENORMALIZE
+        if alpha > 0:
+            self._renormalize_below = max(PHEROMONE_RENORMALIZE,
+                                          PHEROMONE_POWER_RENORMALIZE ** (1 / alpha))
+        
+        if isinstance(distance_matrix, tsp_distance.SharedArray):
+            # Tính trên mảng dùng chung; self.distance_matrix vẫn là SharedArray
+            # để tiến trình con chỉ nhận tên vùng nhớ/đường dẫn file
+            distance_matrix = distance_matrix.array
+        if isinstance(distance_matrix, tsp_distance.DistanceContainer):
+            # Dạng nén/tính theo yêu cầu hỗ trợ cùng cách lấy hàng/phần tử như
+            # ndarray; chỉ engine không dùng candidates mới cần ma trận đầy đủ
+            self._dist = distance_matrix
+        else:
+            self._dist = np.asarray(distance_matrix)
+            if self._dist.dtype.kind != 'f':
+                self._dist = self._dist.astype(np.float64)
+        if candidate_source is not None:
+            self._prepare_candidates(candidates, np.asarray(candidate_source))
+        elif candidates is not None:
+            self._prepare_candidates(min(candidates, self.n_cities - 1))
+        elif engine != 'python':
+            self.pheromone = np.ones((self.n_cities, self.n_cities))
+            self.heuristic = np.zeros((self.n_cities, self.n_cities))
+            distances = np.asarray(self._dist)
+            positive = distances > 0
+            np.fill_diagonal(positive, False)
+            self.heuristic[positive] = 1.0 / distances[positive]
+        else:
+            self.pheromone = [[1.0 for _ in range(self.n_cities)] for _ in range(self.n_cities)]
+            
+          
+            self.heuristic = [[0.0 for _ in range(self.n_cities)] for _ in range(self.n_cities)]
+            for i in range(self.n_cities):
+                row = distance_matrix[i]
+                for j in range(self.n_cities):
+                    if i != j and row[j] > 0:
+                        self.heuristic[i][j] = 1.0 / row[j]
+        if local_search is not None:
+            if candidates is not None:
+                self._neighbor_lists = self.candidate_lists.tolist()
+            else:
+                k = min(LOCAL_SEARCH_NEIGHBORS, self.n_cities - 1)
+                self._neighbor_lists = self._nearest_lists(k).tolist()
+        
+        self._initial_pheromone = 1.0
+        self._tau_limits = None
+        if variant != 'as':
+            self._prepare_variant()
+        self.warm_started = False
+        if initial_pheromone is not None:
+            self.set_pheromone(initial_pheromone)
+        if initial_route is not None:
+            self.seed_route(initial_route)
+            if initial_pheromone is None:
+                self._deposit(self.best_route, self.best_distance)
+
+    def set_pheromone(self, values):
+        """
+        Nạp pheromone (giá trị thực) từ lần giải trước
+
+        Args:
+            values: Ma trận n×n, hoặc n×k theo candidate_lists khi dùng candidates;
+                phần tử NaN giữ giá trị hiện tại
+        """
+        values = np.array(values, dtype=np.float64)
+        n = self.n_cities
+        if self.candidates is not None and values.shape == (n, n):
+            values = np.take_along_axis(values, self.candidate_lists, axis=1)
+        current = self.pheromone_matrix()
+        if values.shape != current.shape:
+            raise ValueError(f"initial_pheromone phải có kích thước {current.shape}, "
+                             f"nhận được {values.shape}")
+        values = np.where(np.isnan(values), current, values)
+        self.pheromone = values.tolist() if self.engine == 'python' else values
+        self._pheromone_scale = 1.0
+        self.warm_started = True
+
+    def seed_route(self, route: List[int]):
+        """Dùng một tuyến có sẵn làm nghiệm tốt nhất nếu nó ngắn hơn nghiệm hiện tại"""
+        route = [int(city) for city in route]
+        if sorted(route) != list(range(self.n_cities)):
+            raise ValueError("initial_route phải là một hoán vị của các index thành phố")
+        distance = self.calculate_route_distance(route)
+        if distance < self.best_distance:
+            self.best_route = route
+            self.best_distance = distance
+        self.warm_started = True
+
+    def remap(self, cities: List[str], distance_matrix, mapping: List[int] = None,
+              **overrides) -> 'TSP_ACO':
+        """
+        Tạo bộ giải cho bài toán đã thay đổi (thêm/bớt thành phố), khởi động ấm
+        từ bộ giải này: pheromone giữa các thành phố còn lại được giữ nguyên,
+        cạnh tới thành phố mới nhận giá trị ban đầu. Tuyến tốt nhất bỏ các thành
+        phố đã xoá rồi chèn thành phố mới vào vị trí rẻ nhất.
+
+        Args:
+            cities: Danh sách thành phố mới
+            distance_matrix: Ma trận khoảng cách mới
+            mapping: mapping[i] là index cũ của thành phố mới i (None hoặc -1:
+                thành phố mới); mặc định ghép theo tên
+            overrides: Tham số khởi tạo thay đổi so với bộ giải này
+
+        Returns:
+            TSP_ACO mới, dùng tiếp bộ sinh số ngẫu nhiên trừ khi có seed/rng
+        """
+        if mapping is None:
+            position = {name: index for index, name in enumerate(self.cities)}
+            mapping = [position.get(name) for name in cities]
+        if len(mapping) != len(cities):
+            raise ValueError("mapping phải có một phần tử cho mỗi thành phố mới")
+        old_index = np.array([-1 if index is None else index for index in mapping], dtype=np.intp)
+        # Một thành phố cũ chỉ ứng với một thành phố mới (tên trùng nhau)
+        old_index[np.setdiff1d(np.flatnonzero(old_index >= 0),
+                               np.unique(old_index, return_index=True)[1])] = -1
+        config = dict(self._config(), candidates=self.candidates)
+        config.update(overrides)
+        if 'seed' not in config and 'rng' not in config:
+            config['rng'] = self.rng
+        solver = TSP_ACO(cities, distance_matrix, **config)
+
+        kept = np.flatnonzero(old_index >= 0)
+        if solver.candidates is None:
+            source, target = np.repeat(kept, len(kept)), np.tile(kept, len(kept))
+        else:
+            source = np.repeat(kept, solver.candidate_lists.shape[1])
+            target = solver.candidate_lists[kept].ravel()
+            known = old_index[target] >= 0
+            source, target = source[known], target[known]
+        values = self._pheromone_values(old_index[source], old_index[target])
+        known = ~np.isnan(values)
+        solver._load_pheromone(source[known], target[known], values[known])
+
+        if self.best_route is not None:
+            new_index = {old: new for new, old in enumerate(old_index.tolist()) if old >= 0}
+            route = [new_index[city] for city in self.best_route if city in new_index]
+            for city in np.flatnonzero(old_index < 0).tolist():
+                route = solver._cheapest_insertion(route, city)
+            if route:
+                solver.seed_route(route)
+        solver.warm_started = True
+        return solver
+
+    def _pheromone_values(self, source: np.ndarray, target: np.ndarray) -> np.ndarray:
+        """Pheromone thực của các cạnh source -> target, NaN với cạnh không lưu pheromone"""
+        values = np.full(len(source), np.nan)
+        if self.engine == 'python':
+            pheromone = self.pheromone_matrix()
+            values[:] = pheromone[source, target]
+            return values
+        rows, columns, edges = self._edge_index(source, target)
+        values[edges] = self.pheromone[rows, columns] * self._pheromone_scale
+        return values
+
+    def _load_pheromone(self, source: np.ndarray, target: np.ndarray, values: np.ndarray):
+        """Gán pheromone thực cho các cạnh source -> target (cạnh không lưu bị bỏ qua)"""
+        scale = self._pheromone_scale
+        if self.engine == 'python':
+            for a, b, value in zip(source.tolist(), target.tolist(), values.tolist()):
+                self.pheromone[a][b] = value / scale
+            return
+        rows, columns, edges = self._edge_index(source, target)
+        self.pheromone[rows, columns] = values[edges] / scale
+
+    def _cheapest_insertion(self, route: List[int], city: int) -> List[int]:
+        """Chèn city vào vị trí làm tuyến dài thêm ít nhất"""
+        if len(route) < 2:
+            return route + [city]
+        here = np.asarray(route)
+        after = np.roll(here, -1)
+        added = self._dist[here, city] + self._dist[city, after] - self._dist[here, after]
+        position = int(added.argmin()) + 1
+        return route[:position] + [city] + route[position:]
+
+    @classmethod
+    def from_coordinates(cls, cities: List[str], coordinates, metric: str = 'euclidean',
+                         normalize: bool = False, dtype=np.float64, **kwargs) -> 'TSP_ACO':
+        """
+        Tạo bộ giải từ tọa độ, ma trận khoảng cách tính bằng tsp_distance
+
+        Args:
+            cities: Danh sách tên các thành phố
+            coordinates: Tọa độ (lat, lon) của từng thành phố
+            metric: 'euclidean', 'haversine' hoặc 'manhattan'
+            normalize: Chuẩn hóa tọa độ về [0, 100] trước khi tính
+            dtype: Kiểu của ma trận khoảng cách
+            kwargs: Các tham số khác của TSP_ACO
+        """
+        matrix = tsp_distance.distance_matrix(coordinates, metric=metric, normalize=normalize,
+                                              dtype=dtype)
+        return cls(cities, matrix, **kwargs)
+
+    def _prepare_variant(self):
+        """
+        Pheromone ban đầu theo độ dài L_nn của tuyến láng giềng gần nhất:
+        MMAS bắt đầu từ tau_max = q / (rho * L_nn), ACS từ tau0 = q / (n * L_nn)
+        """
+        n = self.n_cities
+        visited = np.zeros(n, dtype=bool)
+        route = [0]
+        for _ in range(n - 1):
+            current = route[-1]
+            visited[current] = True
+            if self.candidates is not None:
+                # Láng giềng ứng viên chưa thăm đầu tiên là thành phố chưa thăm gần nhất
+                options = self.candidate_lists[current]
+                options = options[~visited[options]]
+                if len(options):
+                    route.append(int(options[0]))
+                    continue
+            route.append(int(self._nearest_unvisited(current, visited)))
+        length = self.calculate_route_distance(route)
+        if length <= 0:
+            return
+        if self.variant == 'mmas':
+            self._initial_pheromone = self.q / (self.evaporation_rate * length)
+            self._tau_limits = self._mmas_limits(length)
+        else:
+            self._initial_pheromone = self.q / (n * length)
+        self.reset_pheromone()
+
+    def _mmas_limits(self, best_distance: float) -> Tuple[float, float]:
+        """Cận (tau_min, tau_max) của MMAS theo độ dài tuyến tốt nhất"""
+        n = self.n_cities
+        tau_max = self.q / (self.evaporation_rate * best_distance)
+        root = self.p_best ** (1.0 / n)
+        tau_min = tau_max * (1 - root) / (max(n / 2 - 1, 1) * root)
+        return min(tau_min, tau_max), tau_max
+        
+    def _prepare_candidates(self, k: int, candidate_lists: np.ndarray = None):
+        """
+        Lập danh sách k láng giềng gần nhất của mỗi thành phố (tăng dần theo
+        khoảng cách), hoặc dùng candidate_lists có sẵn; pheromone[i, c] và
+        heuristic[i, c] ứng với cạnh từ i tới candidate_lists[i, c]
+        """
+        n = self.n_cities
+        self.candidate_lists = candidate_lists if candidate_lists is not None else self._nearest_lists(k)
+        distances = self._dist[np.arange(n)[:, None], self.candidate_lists]
+        self.heuristic = np.zeros((n, k))
+        positive = distances > 0
+        self.heuristic[positive] = 1.0 / distances[positive]
+        self.pheromone = np.ones((n, k))
+
+    def _nearest_lists(self, k: int) -> np.ndarray:
+        """k thành phố gần nhất của mỗi thành phố, tăng dần theo khoảng cách"""
+        if isinstance(self._dist, tsp_distance.DistanceOracle) and k:
+            # Tìm trên lưới tọa độ, không tính khoảng cách giữa mọi cặp
+            return self._dist.nearest_neighbors(k)
+        return tsp_distance.nearest_neighbors(self._dist, k)
+
+    def _nearest_unvisited(self, cities: np.ndarray, visited: np.ndarray) -> np.ndarray:
+        """Thành phố chưa thăm gần nhất của mỗi hàng, dùng khi hết láng giềng ứng viên"""
+        return np.where(visited, np.inf, self._dist[cities]).argmin(axis=-1)
+
+    @property
+    def steps_log(self) -> TraceSteps:
+        """Log các bước, chỉ định dạng thành chuỗi khi được đọc"""
+        return TraceSteps(self.trace, self._format_event)
+    
+    def _format_event(self, record: tuple) -> str:
+        """Định dạng một sự kiện ghi vết thành dòng log"""
+        event, iteration, _, value, extra = record
+        if event == EVENT_ITERATION:
+            return (f"Iteration {iteration}: tốt nhất của iteration {value:.2f} km, "
+                    f"tốt nhất toàn cục {extra:.2f} km")
+        return f"Iteration {iteration}: Tìm tuyến đường tốt hơn: {value:.2f} km"
         
     def calculate_route_distance(self, route: List[int]) -> float:
         """Tính tổng khoảng cách của một tuyến đường"""
+        dist = self._dist.item
         total_distance = 0
         for i in range(len(route) - 1):
-            total_distance += self.distance_matrix[route[i]][route[i + 1]]
+            total_distance += dist(route[i], route[i + 1])
        
-        total_distance += self.distance_matrix[route[-1]][route[0]]
+        total_distance += dist(route[-1], route[0])
         return total_distance
     
     def select_next_city(self, current_city: int, unvisited: List[int]) -> int:
@@ -77,12 +439,15 @@ class TSP_ACO:
         
       
         if total_probability == 0:
-            return random.choice(unvisited)
+            return unvisited[int(self.rng.integers(len(unvisited)))]
+        
+        if self.variant == 'acs' and self._draw() < self.q0:
+            return unvisited[max(range(len(unvisited)), key=probabilities.__getitem__)]
         
         probabilities = [p / total_probability for p in probabilities]
         
      
-        rand = random.random()
+        rand = self._draw()
         cumulative = 0
         for i, city in enumerate(unvisited):
             cumulative += probabilities[i]
@@ -93,7 +458,7 @@ class TSP_ACO:
     
     def construct_solution(self) -> Tuple[List[int], float]:
         """Xây dựng một tuyến đường cho một con kiến"""
-        start_city = random.randint(0, self.n_cities - 1)
+        start_city = int(self._draw() * self.n_cities)
         route = [start_city]
         unvisited = list(range(self.n_cities))
         unvisited.remove(start_city)
@@ -104,20 +469,69 @@ class TSP_ACO:
             next_city = self.select_next_city(current_city, unvisited)
             route.append(next_city)
             unvisited.remove(next_city)
+            if self.variant == 'acs':
+                self._local_update(current_city, next_city)
         
         distance = self.calculate_route_distance(route)
         return route, distance
     
+    def evaporate(self):
+        """
+        Bay hơi pheromone trong O(1): chỉ nhân hệ số chung với (1 - tỷ lệ bay hơi),
+        các lượng cộng thêm sau đó được chia cho hệ số này
+        """
+        self._pheromone_scale *= (1 - self.evaporation_rate)
+        if self._pheromone_scale < self._renormalize_below:
+            self._renormalize_pheromone()
+
+    def _renormalize_pheromone(self):
+        """Nhân hệ số chung vào ma trận pheromone rồi đặt lại hệ số bằng 1"""
+        scale = self._pheromone_scale
+        if self.engine != 'python':
+            self.pheromone *= scale
+        else:
+            for row in self.pheromone:
+                for j in range(len(row)):
+                    row[j] *= scale
+        self._pheromone_scale = 1.0
+
+    def reset_pheromone(self):
+        """Đặt lại pheromone về giá trị ban đầu (giữ nghiệm tốt nhất), dùng khi trì trệ"""
+        value = self._initial_pheromone
+        if self.variant == 'mmas' and self._tau_limits is not None:
+            value = self._tau_limits[1]
+        if self.engine != 'python':
+            self.pheromone[:] = value
+        else:
+            self.pheromone = [[value for _ in range(self.n_cities)] for _ in range(self.n_cities)]
+        self._pheromone_scale = 1.0
+
+    def branching_factor(self, lambda_: float = BRANCHING_LAMBDA) -> float:
+        """
+        Hệ số lambda-branching: số cạnh trung bình mỗi thành phố có pheromone lớn
+        hơn min + lambda * (max - min) của hàng; gần 1-2 nghĩa là đàn kiến đã
+        hội tụ về một tuyến
+        """
+        values = np.asarray(self.pheromone, dtype=np.float64)
+        if values.shape[0] == values.shape[1]:
+            values = values.copy()
+            np.fill_diagonal(values, np.nan)
+        low = np.nanmin(values, axis=1, keepdims=True)
+        high = np.nanmax(values, axis=1, keepdims=True)
+        return float((values >= low + lambda_ * (high - low)).sum(axis=1).mean())
+
+    def pheromone_matrix(self) -> np.ndarray:
+        """Giá trị pheromone thực (đã tính hệ số bay hơi chung)"""
+        return np.asarray(self.pheromone, dtype=np.float64) * self._pheromone_scale
+
     def update_pheromone(self, all_routes: List[Tuple[List[int], float]]):
         """Cập nhật ma trận pheromone"""
        
-        for i in range(self.n_cities):
-            for j in range(self.n_cities):
-                self.pheromone[i][j] *= (1 - self.evaporation_rate)
+        self.evaporate()
         
       
         for route, distance in all_routes:
-            pheromone_deposit = self.q / distance
+            pheromone_deposit = self.q / distance / self._pheromone_scale
             for i in range(len(route) - 1):
                 self.pheromone[route[i]][route[i + 1]] += pheromone_deposit
                 self.pheromone[route[i + 1]][route[i]] += pheromone_deposit
@@ -126,17 +540,489 @@ class TSP_ACO:
             self.pheromone[route[-1]][route[0]] += pheromone_deposit
             self.pheromone[route[0]][route[-1]] += pheromone_deposit
     
-    def solve(self, verbose: bool = False) -> dict:
+    def choice_info(self) -> np.ndarray:
+        """
+        Ma trận lựa chọn pheromone^alpha * heuristic^beta của engine 'numpy'/'batched'.
+        Hệ số bay hơi chung nhân mọi phần tử như nhau nên không cần tính vào.
+        """
+        return self.pheromone ** self.alpha * self.heuristic ** self.beta
+
+    def construct_solution_numpy(self, choice: np.ndarray) -> Tuple[List[int], float]:
+        """
+        Xây dựng một tuyến đường cho một con kiến với engine 'numpy': chọn
+        thành phố kế tiếp bằng tổng tích luỹ của hàng ma trận lựa chọn và tìm
+        kiếm nhị phân. Cột của thành phố đã thăm trong bản sao ma trận được
+        đặt về 0 nên không cần lọc lại ở mỗi bước.
+
+        Args:
+            choice: Ma trận lựa chọn của iteration hiện tại (choice_info)
+        """
+        n = self.n_cities
+        acs = self.variant == 'acs'
+        weights = choice.copy()
+        visited = np.zeros(n, dtype=bool)
+        city = int(self._draw() * n)
+        route = [city]
+        for _ in range(n - 1):
+            weights[:, city] = 0.0
+            visited[city] = True
+            current = city
+            cumulative = weights[current].cumsum()
+            total = cumulative[-1]
+            if total > 0 and acs and self._draw() < self.q0:
+                city = int(weights[current].argmax())
+            elif total > 0:
+                city = int(cumulative.searchsorted(self._draw() * total, side='right'))
+            if total <= 0 or city >= n or visited[city]:
+                # Mọi trọng số còn lại bằng 0 (hoặc sai số làm tròn): chọn ngẫu nhiên
+                city = int(self.rng.choice(np.flatnonzero(~visited)))
+            route.append(city)
+            if acs:
+                self._local_update(current, city, choice)
+        distance = float(self._dist[route, route[1:] + route[:1]].sum())
+        return route, distance
+
+    def construct_solution_candidates(self, choice: np.ndarray) -> Tuple[List[int], float]:
+        """
+        Xây dựng một tuyến đường cho một con kiến, chỉ chọn trong các láng giềng
+        ứng viên chưa thăm; hết ứng viên thì đi tới thành phố chưa thăm gần nhất
+
+        Args:
+            choice: Ma trận lựa chọn n×k của iteration hiện tại (choice_info)
+        """
+        n = self.n_cities
+        acs = self.variant == 'acs'
+        candidate_lists = self.candidate_lists
+        visited = np.zeros(n, dtype=bool)
+        city = int(self._draw() * n)
+        route = [city]
+        for _ in range(n - 1):
+            visited[city] = True
+            current = city
+            neighbours = candidate_lists[current]
+            weights = choice[current] * ~visited[neighbours]
+            cumulative = weights.cumsum()
+            total = cumulative[-1]
+            if total > 0:
+                if acs and self._draw() < self.q0:
+                    pick = int(weights.argmax())
+                else:
+                    pick = int(cumulative.searchsorted(self._draw() * total, side='right'))
+                city = int(neighbours[min(pick, len(neighbours) - 1)])
+            if total <= 0 or visited[city]:
+                city = int(self._nearest_unvisited(current, visited))
+            route.append(city)
+            if acs:
+                self._local_update(current, city, choice)
+        distance = float(self._dist[route, route[1:] + route[:1]].sum())
+        return route, distance
+
+    def construct_colony_batched(self, choice: np.ndarray) -> List[Tuple[List[int], float]]:
+        """
+        Xây dựng tuyến đường cho cả đàn kiến cùng lúc: mỗi bước, tập đã thăm
+        là mặt nạ (số kiến × n), xác suất là ma trận (số kiến × n) lấy từ các
+        hàng của ma trận lựa chọn, và mọi con kiến chọn thành phố kế tiếp trong
+        một phép so sánh với tổng tích luỹ. Với candidates, ma trận xác suất
+        chỉ có k cột ứng với các láng giềng ứng viên.
+
+        Args:
+            choice: Ma trận lựa chọn của iteration hiện tại (choice_info)
+        """
+        n, m = self.n_cities, self.n_ants
+        acs = self.variant == 'acs'
+        ants = np.arange(m)
+        routes = np.empty((m, n), dtype=np.intp)
+        # Mọi số ngẫu nhiên của iteration được rút một lần: hàng 0 cho thành phố
+        # xuất phát, hàng step cho bước step (và thêm n hàng cho quy tắc q0 của ACS)
+        uniforms = self.rng.random((2 * n if acs else n, m))
+        routes[:, 0] = (uniforms[0] * n).astype(np.intp)
+        visited = np.zeros((m, n), dtype=bool)
+        visited[ants, routes[:, 0]] = True
+        candidate_lists = self.candidate_lists if self.candidates is not None else None
+        for step in range(1, n):
+            current = routes[:, step - 1]
+            if candidate_lists is not None:
+                neighbours = candidate_lists[current]
+                weights = choice[current] * ~visited[ants[:, None], neighbours]
+            else:
+                weights = choice[current]
+                weights[visited] = 0.0
+            cumulative = weights.cumsum(axis=1)
+            totals = cumulative[:, -1]
+            draws = uniforms[step] * totals
+            # Số phần tử tổng tích luỹ <= giá trị rút = vị trí đầu tiên vượt quá nó
+            picks = np.minimum((cumulative <= draws[:, None]).sum(axis=1), weights.shape[1] - 1)
+            if acs:
+                greedy = uniforms[n + step] < self.q0
+                picks[greedy] = weights[greedy].argmax(axis=1)
+            if candidate_lists is not None:
+                cities = neighbours[ants, picks]
+            else:
+                cities = picks
+            stuck = (totals <= 0) | visited[ants, cities]
+            if candidate_lists is not None:
+                if stuck.any():
+                    cities[stuck] = self._nearest_unvisited(current[stuck], visited[stuck])
+            else:
+                for ant in np.flatnonzero(stuck):
+                    # Mọi trọng số còn lại bằng 0 (hoặc sai số làm tròn): chọn ngẫu nhiên
+                    cities[ant] = self.rng.choice(np.flatnonzero(~visited[ant]))
+            routes[:, step] = cities
+            visited[ants, cities] = True
+            if acs:
+                self._local_update(current, cities, choice)
+        distances = self._dist[routes, np.roll(routes, -1, axis=1)].sum(axis=1)
+        return list(zip(routes.tolist(), distances.tolist()))
+
+    def update_pheromone_numpy(self, all_routes: List[Tuple[List[int], float]]):
+        """Cập nhật ma trận pheromone ndarray: bay hơi rồi cộng dồn theo cạnh của mọi tuyến"""
+        self.evaporate()
+        self._deposit_numpy(all_routes)
+
+    def _deposit_numpy(self, all_routes: List[Tuple[List[int], float]]):
+        """Cộng q / khoảng cách vào pheromone ndarray trên mọi cạnh (hai chiều) của các tuyến"""
+        routes = np.array([route for route, _ in all_routes], dtype=np.intp)
+        following = np.roll(routes, -1, axis=1)
+        deposits = np.repeat([self.q / distance / self._pheromone_scale for _, distance in all_routes],
+                             routes.shape[1])
+        for source, target in ((routes.ravel(), following.ravel()), (following.ravel(), routes.ravel())):
+            rows, columns, edges = self._edge_index(source, target)
+            np.add.at(self.pheromone, (rows, columns), deposits[edges])
+
+    def _edge_index(self, source: np.ndarray, target: np.ndarray) -> tuple:
+        """
+        Vị trí (hàng, cột) trong ma trận pheromone ndarray của các cạnh source -> target,
+        cùng chỉ số các cạnh có vị trí. Với candidates, chỉ cạnh tới láng giềng
+        ứng viên có pheromone; các cạnh còn lại bị bỏ qua.
+        """
+        if self.candidates is None:
+            return source, target, np.arange(len(source))
+        edges, slots = np.nonzero(self.candidate_lists[source] == target[:, None])
+        return source[edges], slots, edges
+
+    def _local_update(self, source, target, choice: np.ndarray = None):
+        """
+        Cập nhật cục bộ của ACS trên cạnh vừa đi qua (hai chiều):
+        tau = (1 - xi) * tau + xi * tau0, đồng thời sửa ma trận lựa chọn
+        """
+        xi = self.local_evaporation
+        added = xi * self._initial_pheromone / self._pheromone_scale
+        if self.engine == 'python':
+            for a, b in ((source, target), (target, source)):
+                self.pheromone[a][b] = (1 - xi) * self.pheromone[a][b] + added
+            return
+        if self.candidates is None and np.ndim(source) == 0:
+            # Một con kiến, ma trận đầy đủ: cập nhật trực tiếp từng phần tử
+            for a, b in ((source, target), (target, source)):
+                value = (1 - xi) * self.pheromone[a, b] + added
+                self.pheromone[a, b] = value
+                choice[a, b] = value ** self.alpha * self.heuristic[a, b] ** self.beta
+            return
+        source, target = np.atleast_1d(source), np.atleast_1d(target)
+        for a, b in ((source, target), (target, source)):
+            rows, columns, _ = self._edge_index(a, b)
+            self.pheromone[rows, columns] = (1 - xi) * self.pheromone[rows, columns] + added
+            choice[rows, columns] = (self.pheromone[rows, columns] ** self.alpha
+                                     * self.heuristic[rows, columns] ** self.beta)
+
+    def _deposit(self, route: List[int], distance: float):
+        """Cộng q / khoảng cách vào pheromone trên các cạnh của một tuyến (mọi engine)"""
+        if self.engine != 'python':
+            self._deposit_numpy([(route, distance)])
+            return
+        deposit = self.q / distance / self._pheromone_scale
+        for i in range(len(route)):
+            a, b = route[i], route[(i + 1) % len(route)]
+            self.pheromone[a][b] += deposit
+            self.pheromone[b][a] += deposit
+
+    def _clamp_pheromone(self):
+        """MMAS: chặn pheromone thực trong [tau_min, tau_max]"""
+        low, high = (limit / self._pheromone_scale for limit in self._tau_limits)
+        if self.engine != 'python':
+            np.clip(self.pheromone, low, high, out=self.pheromone)
+            return
+        for row in self.pheromone:
+            for j in range(len(row)):
+                row[j] = min(max(row[j], low), high)
+
+    def _acs_global_update(self):
+        """
+        ACS: chỉ các cạnh của tuyến tốt nhất toàn cục bay hơi và nhận pheromone,
+        tau = (1 - rho) * tau + rho * q / L
+        """
+        rho = self.evaporation_rate
+        added = rho * self.q / self.best_distance / self._pheromone_scale
+        route = self.best_route
+        if self.engine == 'python':
+            for i in range(len(route)):
+                a, b = route[i], route[(i + 1) % len(route)]
+                for x, y in ((a, b), (b, a)):
+                    self.pheromone[x][y] = (1 - rho) * self.pheromone[x][y] + added
+            return
+        source = np.asarray(route, dtype=np.intp)
+        target = np.roll(source, -1)
+        for a, b in ((source, target), (target, source)):
+            rows, columns, _ = self._edge_index(a, b)
+            self.pheromone[rows, columns] = (1 - rho) * self.pheromone[rows, columns] + added
+
+    def update_pheromone_variant(self, all_routes: List[Tuple[List[int], float]], iteration: int):
+        """Cập nhật pheromone sau mỗi iteration theo biến thể đã chọn"""
+        if self.variant == 'as':
+            if self.engine != 'python':
+                self.update_pheromone_numpy(all_routes)
+            else:
+                self.update_pheromone(all_routes)
+        elif self.variant == 'mmas':
+            if (iteration + 1) % MMAS_GLOBAL_BEST_INTERVAL:
+                route, distance = min(all_routes, key=lambda item: item[1])
+            else:
+                route, distance = self.best_route, self.best_distance
+            self.evaporate()
+            if distance > 0:
+                self._deposit(route, distance)
+                self._tau_limits = self._mmas_limits(self.best_distance)
+                self._clamp_pheromone()
+        elif self.best_distance > 0:
+            self._acs_global_update()
+
+    def construct_colony(self) -> List[Tuple[List[int], float]]:
+        """Xây dựng tuyến đường cho cả đàn kiến trong một iteration"""
+        if self.engine == 'batched':
+            return self.construct_colony_batched(self.choice_info())
+        # Rút sẵn số ngẫu nhiên cho cả iteration: mỗi con kiến một số cho thành
+        # phố xuất phát và tối đa một (ACS: hai) số mỗi bước
+        per_step = 2 if self.variant == 'acs' else 1
+        uniforms = self.rng.random(self.n_ants * (1 + per_step * (self.n_cities - 1)))
+        self._draw = iter(uniforms.tolist()).__next__
+        if self.engine == 'numpy':
+            choice = self.choice_info()
+            if self.candidates is not None:
+                all_routes = [self.construct_solution_candidates(choice) for _ in range(self.n_ants)]
+            else:
+                all_routes = [self.construct_solution_numpy(choice) for _ in range(self.n_ants)]
+        else:
+            all_routes = [self.construct_solution() for _ in range(self.n_ants)]
+        self._draw = self.rng.random
+        return all_routes
+
+    def improve_routes(self, all_routes: List[Tuple[List[int], float]]) -> List[Tuple[List[int], float]]:
+        """Áp dụng tìm kiếm cục bộ cho tuyến của mọi con kiến hoặc chỉ tuyến tốt nhất"""
+        if self.local_search == 'best':
+            targets = [min(range(len(all_routes)), key=lambda ant: all_routes[ant][1])]
+        else:
+            targets = range(len(all_routes))
+        all_routes = list(all_routes)
+        for ant in targets:
+            route = local_search(all_routes[ant][0], self._dist, self._neighbor_lists)
+            all_routes[ant] = (route, float(self._dist[route, route[1:] + route[:1]].sum()))
+        return all_routes
+
+    def run_iteration(self, iteration: int):
+        """Một iteration: cả đàn kiến xây dựng tuyến, cập nhật nghiệm tốt nhất và pheromone"""
+        started = time.time()
+        all_routes = self.construct_colony()
+        self.timings['construction'] += time.time() - started
+        if self.local_search is not None:
+            started = time.time()
+            all_routes = self.improve_routes(all_routes)
+            self.timings['local_search'] += time.time() - started
+        
+      
+        for route, distance in all_routes:
+            if distance < self.best_distance:
+                self.best_distance = distance
+                self.best_route = route
+                
+                if self.trace_level:
+                    self.trace.record(EVENT_IMPROVEMENT, iteration + 1, value=distance)
+        
+     
+        started = time.time()
+        self.update_pheromone_variant(all_routes, iteration)
+        self.timings['pheromone'] += time.time() - started
+        
+    
+        self.convergence_data.append(self.best_distance)
+        if self.trace_level == TRACE_ALL:
+            self.trace.record(EVENT_ITERATION, iteration + 1,
+                              value=min(distance for _, distance in all_routes),
+                              extra=self.best_distance)
+
+    def run_iterations(self, verbose: bool = False, after_iteration=None) -> str:
+        """
+        Vòng lặp chính: chạy tới n_iterations hoặc tới khi một điều kiện dừng
+        trong self._limits thoả mãn. Khi trì trệ (không cải thiện lâu hoặc hệ
+        số phân nhánh thấp) và có 'restart', pheromone được đặt lại thay vì dừng.
+
+        Args:
+            verbose: In tiến trình mỗi 10 iterations
+            after_iteration: Hàm gọi sau mỗi iteration với số thứ tự iteration
+
+        Returns:
+            Lý do dừng sớm ('target_distance', 'island_target' - đảo khác đã
+            đạt target_distance, 'time_limit', 'stagnation', 'converged'),
+            None nếu chạy đủ n_iterations
+        """
+        stagnation = 0
+        for iteration in range(self.n_iterations):
+            previous = self.best_distance
+            self.run_iteration(iteration)
+            self.iterations_run = iteration + 1
+            stagnation = 0 if self.best_distance < previous else stagnation + 1
+            if after_iteration is not None:
+                after_iteration(iteration)
+            
+            if verbose and (iteration + 1) % 10 == 0:
+                print(f"Iteration {iteration + 1}/{self.n_iterations}: "
+                      f"Khoảng cách tốt nhất = {self.best_distance:.2f} km")
+            
+            reason = self._check_stop(stagnation)
+            if reason in ('stagnation', 'converged') and self._limits.get('restart'):
+                self.reset_pheromone()
+                self.restarts += 1
+                stagnation = 0
+                if verbose:
+                    print(f"Iteration {iteration + 1}: trì trệ ({reason}), đặt lại pheromone")
+            elif reason is not None:
+                return reason
+        return None
+
+    def _check_stop(self, stagnation: int) -> str:
+        """Lý do dừng theo các giới hạn trong self._limits, None nếu tiếp tục"""
+        limits = self._limits
+        target = limits.get('target_distance')
+        if target is not None and self.best_distance <= target:
+            return 'target_distance'
+        if self._stop_event is not None and self._stop_event.is_set():
+            return 'island_target'
+        deadline = limits.get('deadline')
+        if deadline is not None and time.time() >= deadline:
+            return 'time_limit'
+        max_stagnation = limits.get('max_stagnation')
+        if max_stagnation is not None and stagnation >= max_stagnation:
+            return 'stagnation'
+        min_branching = limits.get('min_branching')
+        if min_branching is not None and self.branching_factor() < min_branching:
+            return 'converged'
+        return None
+
+    def migrate(self, route: List[int], distance: float):
+        """
+        Nhận tuyến đường di cư từ đàn kiến khác: nếu tốt hơn thì dùng làm nghiệm
+        tốt nhất và cộng thêm pheromone trên các cạnh của nó
+        """
+        if distance >= self.best_distance:
+            return
+        self.best_route = list(route)
+        self.best_distance = distance
+        self._deposit(self.best_route, distance)
+
+    def _config(self) -> dict:
+        """Tham số khởi tạo của bộ giải, dùng để tạo đàn kiến ở tiến trình con"""
+        return {'n_ants': self.n_ants, 'n_iterations': self.n_iterations, 'alpha': self.alpha,
+                'beta': self.beta, 'evaporation_rate': self.evaporation_rate, 'q': self.q,
+                'trace': self.trace_level, 'engine': self.engine,
+                'candidates': (self._candidate_source if self._candidate_source is not None
+                               else self.candidates),
+                'local_search': self.local_search, 'variant': self.variant, 'q0': self.q0,
+                'local_evaporation': self.local_evaporation, 'p_best': self.p_best}
+
+    def _solve_islands(self, islands: int, migration_interval: int) -> List[dict]:
+        """
+        Mô hình đảo: mỗi đảo là một đàn kiến độc lập (seed riêng) chạy trong một
+        tiến trình của ProcessPoolExecutor. Cứ migration_interval iteration, mỗi
+        đảo ghi nghiệm tốt nhất của mình vào bộ nhớ chia sẻ (multiprocessing.Array),
+        chờ mọi đảo tại một Barrier rồi nhận nghiệm tốt nhất trong các đảo. Hai
+        bộ đệm luân phiên theo lượt trao đổi nên đảo chạy nhanh không ghi đè bản
+        mà đảo chậm chưa đọc: cùng seed cho cùng kết quả. Đảo dừng sớm (trì trệ)
+        vẫn góp nghiệm cuối vào các lượt còn lại; dừng theo time_limit hoặc
+        target_distance phụ thuộc thời gian nên không tái lập được.
+
+        Returns:
+            Danh sách kết quả từng đảo (khoảng cách, hội tụ)
+        """
+        shared_routes = multiprocessing.Array('i', 2 * islands * self.n_cities, lock=False)
+        shared_distances = multiprocessing.Array('d', 2 * islands, lock=False)
+        finished = multiprocessing.Array('b', islands, lock=False)
+        barrier = multiprocessing.Barrier(islands)
+        stop_event = multiprocessing.Event()
+        streams = self.rng.spawn(islands)
+        config = self._config()
+        if self.warm_started:
+            config['initial_pheromone'] = self.pheromone_matrix()
+            config['initial_route'] = self.best_route
+        with ProcessPoolExecutor(max_workers=islands, initializer=_init_island,
+                                 initargs=(self.cities, self.distance_matrix, config,
+                                           shared_routes, shared_distances, finished, barrier,
+                                           stop_event)) as executor:
+            futures = [executor.submit(_run_island, index, streams[index], migration_interval,
+                                       self._limits)
+                       for index in range(islands)]
+            results = [future.result() for future in futures]
+
+        for route, distance, _, timings, reason, iterations, restarts in results:
+            if distance < self.best_distance:
+                self.best_distance = distance
+                self.best_route = route
+            for stage, seconds in timings.items():
+                self.timings[stage] += seconds
+            # Lý do chung lấy theo đảo đã đạt target_distance, không theo đảo dừng theo nó
+            if reason is not None and self.stop_reason in (None, 'island_target'):
+                self.stop_reason = reason
+            self.iterations_run = max(self.iterations_run, iterations)
+            self.restarts += restarts
+        # Đảo dừng sớm giữ giá trị cuối cho các iteration còn lại
+        length = max(len(result[2]) for result in results)
+        padded = [convergence + convergence[-1:] * (length - len(convergence))
+                  for _, _, convergence, *_ in results]
+        self.convergence_data = [min(values) for values in zip(*padded)]
+        previous = float('inf')
+        for iteration, distance in enumerate(self.convergence_data):
+            if distance < previous and self.trace_level:
+                self.trace.record(EVENT_IMPROVEMENT, iteration + 1, value=distance)
+            previous = distance
+        return [{'distance': distance, 'convergence': convergence, 'stop_reason': reason,
+                 'restarts': restarts}
+                for _, distance, convergence, _, reason, _, restarts in results]
+
+    def solve(self, verbose: bool = False, islands: int = None,
+              migration_interval: int = 10, time_limit: float = None,
+              max_stagnation: int = None, target_distance: float = None,
+              min_branching: float = None, restart: bool = False) -> dict:
         """
         Giải bài toán TSP bằng ACO
         
         Args:
             verbose: In chi tiết các bước
+            islands: Số đàn kiến chạy song song trong các tiến trình riêng
+                (None hoặc 1: một đàn)
+            migration_interval: Số iteration giữa hai lần trao đổi nghiệm tốt
+                nhất giữa các đảo
+            time_limit: Giới hạn thời gian (giây)
+            max_stagnation: Dừng sau chừng này iteration liên tiếp không cải thiện
+            target_distance: Dừng khi tìm được tuyến không dài hơn giá trị này
+            min_branching: Dừng khi hệ số lambda-branching của pheromone nhỏ hơn
+                ngưỡng này (đàn kiến đã hội tụ)
+            restart: Khi trì trệ (max_stagnation hoặc min_branching) thì đặt lại
+                pheromone và chạy tiếp thay vì dừng
             
         Returns:
             dict: Kết quả gồm tuyến đường, khoảng cách, thời gian, log
         """
         start_time = time.time()
+        if migration_interval < 1:
+            raise ValueError("migration_interval phải là số nguyên dương")
+        self._limits = {'deadline': start_time + time_limit if time_limit is not None else None,
+                        'max_stagnation': max_stagnation, 'target_distance': target_distance,
+                        'min_branching': min_branching, 'restart': restart}
+        # Gọi solve nhiều lần: pheromone và nghiệm tốt nhất được giữ, số liệu tính lại
+        self.convergence_data = []
+        self.trace.clear()
+        self.timings = dict.fromkeys(self.timings, 0.0)
+        self.iterations_run = 0
+        self.restarts = 0
+        self.stop_reason = None
         
         if verbose:
             print(f"\n{'='*70}")
@@ -150,34 +1036,16 @@ class TSP_ACO:
             print(f"Tham số Beta (heuristic): {self.beta}")
             print(f"Tỷ lệ bay hơi: {self.evaporation_rate}")
             print(f"Q constant: {self.q}")
+            print(f"Engine: {self.engine}, biến thể: {self.variant}")
+            if islands is not None and islands > 1:
+                print(f"Số đảo: {islands}, trao đổi mỗi {migration_interval} iterations")
             print(f"{'='*70}\n")
         
-        for iteration in range(self.n_iterations):
-            all_routes = []
-            
-          
-            for ant in range(self.n_ants):
-                route, distance = self.construct_solution()
-                all_routes.append((route, distance))
-                
-               
-                if distance < self.best_distance:
-                    self.best_distance = distance
-                    self.best_route = route
-                    
-                    if verbose and len(self.steps_log) < 20:
-                        log_msg = f"Iteration {iteration + 1}: Tìm tuyến đường tốt hơn: {self.best_distance:.2f} km"
-                        self.steps_log.append(log_msg)
-            
-         
-            self.update_pheromone(all_routes)
-            
-        
-            self.convergence_data.append(self.best_distance)
-            
-            if verbose and (iteration + 1) % 10 == 0:
-                print(f"Iteration {iteration + 1}/{self.n_iterations}: "
-                      f"Khoảng cách tốt nhất = {self.best_distance:.2f} km")
+        island_results = None
+        if islands is not None and islands > 1:
+            island_results = self._solve_islands(islands, migration_interval)
+        else:
+            self.stop_reason = self.run_iterations(verbose)
         
         self.execution_time = time.time() - start_time
         
@@ -189,6 +1057,12 @@ class TSP_ACO:
             print(f"Tuyến đường tốt nhất: {' -> '.join(best_route_names)} -> {best_route_names[0]}")
             print(f"Tổng khoảng cách: {self.best_distance:.2f} km")
             print(f"Thời gian thực thi: {self.execution_time:.4f} giây")
+            if self.stop_reason is not None:
+                print(f"Dừng sớm sau {self.iterations_run} iterations ({self.stop_reason})")
+            if self.restarts:
+                print(f"Số lần đặt lại pheromone: {self.restarts}")
+            if self.local_search is not None:
+                print(f"Trong đó tìm kiếm cục bộ: {self.timings['local_search']:.4f} giây")
             print(f"{'='*70}\n")
         
         return {
@@ -197,6 +1071,11 @@ class TSP_ACO:
             'time': self.execution_time,
             'algorithm': 'ACO (Ant Colony Optimization)',
             'convergence': self.convergence_data,
+            'stop_reason': self.stop_reason,
+            'iterations': self.iterations_run,
+            'restarts': self.restarts,
+            'islands': island_results,
+            'timings': dict(self.timings),
             'steps': self.steps_log,
             'parameters': {
                 'n_ants': self.n_ants,
@@ -204,6 +1083,76 @@ class TSP_ACO:
                 'alpha': self.alpha,
                 'beta': self.beta,
                 'evaporation_rate': self.evaporation_rate,
-                'q': self.q
+                'q': self.q,
+                'engine': self.engine,
+                'candidates': self.candidates,
+                'local_search': self.local_search,
+                'variant': self.variant,
+                'seed': self.seed,
+                'warm_start': self.warm_started,
+                'islands': islands if island_results is not None else 1,
+                'migration_interval': migration_interval if island_results is not None else None
             }
-        }
\ No newline at end of file
+        }
+
+
+_ISLAND_PROBLEM = None
+
+
+def _init_island(cities: List[str], distance_matrix, config: dict, shared_routes, shared_distances,
+                 finished, barrier, stop_event):
+    """Lưu bài toán, bộ nhớ chia sẻ và các đối tượng đồng bộ trong mỗi tiến trình con"""
+    global _ISLAND_PROBLEM
+    _ISLAND_PROBLEM = (cities, distance_matrix, config, shared_routes, shared_distances, finished,
+                       barrier, stop_event)
+
+
+def _run_island(index: int, rng: np.random.Generator, migration_interval: int, limits: dict) -> tuple:
+    """Chạy một đàn kiến độc lập, định kỳ trao đổi nghiệm tốt nhất với các đảo khác"""
+    (cities, distance_matrix, config, shared_routes, shared_distances, finished, barrier,
+     stop_event) = _ISLAND_PROBLEM
+    solver = TSP_ACO(cities, distance_matrix, **dict(config, trace='off'), rng=rng)
+    solver._limits = limits
+    solver._stop_event = stop_event
+    n = solver.n_cities
+    islands = len(finished)
+    rounds = 0
+
+    def publish() -> int:
+        # Lượt trao đổi chẵn/lẻ dùng nửa đầu/nửa sau của bộ nhớ chia sẻ
+        nonlocal rounds
+        rounds += 1
+        offset = rounds % 2 * islands
+        slot = offset + index
+        shared_distances[slot] = solver.best_distance
+        shared_routes[slot * n:(slot + 1) * n] = solver.best_route
+        return offset
+
+    def exchange(iteration):
+        if (iteration + 1) % migration_interval:
+            return
+        offset = publish()
+        barrier.wait()
+        best = min(range(offset, offset + islands), key=shared_distances.__getitem__)
+        solver.migrate(shared_routes[best * n:(best + 1) * n], shared_distances[best])
+
+    try:
+        reason = solver.run_iterations(after_iteration=exchange)
+        # Đảo đã dừng vẫn góp nghiệm cuối vào các lượt còn lại tới khi mọi đảo
+        # dừng, nên dữ liệu các đảo khác nhận không phụ thuộc thứ tự dừng
+        finished[index] = 1
+        if reason == 'target_distance':
+            stop_event.set()
+        while not all(finished):
+            publish()
+            try:
+                barrier.wait()
+            except threading.BrokenBarrierError:
+                break
+        barrier.abort()
+    except BaseException:
+        # Không để các đảo khác chờ mãi đảo bị lỗi
+        barrier.abort()
+        raise
+    return (solver.best_route, solver.best_distance, solver.convergence_data, solver.timings,
+            reason, solver.iterations_run, solver.restarts)
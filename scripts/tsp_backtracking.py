@@ -1,33 +1,375 @@
 
 
+import hashlib
+import itertools
+import math
+import multiprocessing
+import os
+import struct
 import time
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from typing import List, Tuple
 
+import numpy as np
+
+import tsp_distance
+from tsp_heuristics import (greedy_edge_route, is_symmetric, nearest_neighbor_route,
+                            rotate_to_start, two_opt)
+from tsp_trace import (EVENT_EXPAND, EVENT_IMPROVEMENT, EVENT_SEED, EVENT_SUMMARY, TRACE_ALL,
+                       TraceBuffer, TraceSteps, parse_trace_level)
+
+METHODS = ('backtracking', 'held_karp')
+BOUNDS = (None, 'two_edges', 'mst', 'reduced')
+ENGINES = ('recursive', 'iterative')
+SYMMETRY_MODES = ('auto', True, False)
+ORDERINGS = (None, 'nearest', 'bound')
+WARM_STARTS = ('nearest_neighbor', 'greedy_edge', 'two_opt')
+SEED_METHODS = WARM_STARTS + ('initial_route',)
+# Các việc định kỳ (đồng bộ cận giữa các tiến trình, kiểm tra giới hạn...) chạy mỗi TICK_MASK + 1 nút
+TICK_MASK = 1023
+ALGORITHM_NAMES = {
+    'backtracking': 'Backtracking (Quay lui)',
+    'held_karp': 'Held-Karp (Quy hoạch động)',
+}
+# Checkpoint: header (magic, version, cờ có nghiệm, n, base, top), số nút,
+# khoảng cách tốt nhất và tổng cận hai cạnh đang duy trì, dấu vân tay SHA-256 của bài toán, 4 mảng trạng thái
+# ngăn xếp rồi 4 mảng bộ đếm theo độ sâu, tất cả độ dài n. Bitmask pending
+# dài tùy n nên mỗi phần tử ghi bằng (n + 7) // 8 byte little-endian
+CHECKPOINT_MAGIC = b'TSPB'
+CHECKPOINT_VERSION = 4
+_CHECKPOINT_HEADER = struct.Struct('<4sBBHhh')
+_CHECKPOINT_COUNTERS = struct.Struct('<qdd')
+
+
+class _SearchStopped(Exception):
+    """Dừng tìm kiếm giữa chừng vì hết thời gian, hết số nút hoặc bị huỷ"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
 class TSPBacktracking:
-    def __init__(self, cities: List[str], distance_matrix):
+    def __init__(self, cities: List[str], distance_matrix, method: str = 'backtracking',
+                 bound: str = None, engine: str = 'recursive', symmetry='auto',
+                 ordering: str = 'nearest', trace: str = 'improvements', trace_first: int = 0):
         """
         Khởi tạo bài toán TSP với Backtracking
-        
+
         Args:
             cities: Danh sách tên các thành phố
-            distance_matrix: Ma trận khoảng cách giữa các thành phố
+            distance_matrix: Ma trận khoảng cách giữa các thành phố (list lồng
+                nhau, ndarray/memmap, tsp_distance.CondensedDistanceMatrix,
+                tsp_distance.DistanceOracle hoặc tsp_distance.SharedArray - tiến
+                trình con khi solve(workers=...) gắn vào cùng bản dùng chung)
+            method: 'backtracking' (quay lui, O(n!)) hoặc 'held_karp'
+                (quy hoạch động trên bitmask, O(n²·2ⁿ))
+            bound: Cận dưới dùng để cắt nhánh - None, 'two_edges'
+                (hai cạnh rẻ nhất), 'mst' (cây khung nhỏ nhất) hoặc
+                'reduced' (ma trận chi phí rút gọn)
+            engine: 'recursive' (đệ quy) hoặc 'iterative' (ngăn xếp tường minh,
+                bitmask và bảng khoảng cách phẳng, không cấp phát trong vòng lặp)
+            symmetry: Loại bỏ tuyến đường đi ngược chiều bằng cách yêu cầu
+                thành phố 1 được thăm trước thành phố 2. 'auto' bật khi ma trận
+                đối xứng; True/False bật/tắt bắt buộc
+            ordering: Thứ tự mở rộng thành phố con - 'nearest' (gần nhất trước,
+                theo danh sách láng giềng sắp xếp sẵn), 'bound' (khoảng cách cộng
+                cận dưới của cây con, cần bound) hoặc None (thứ tự tập hợp)
+            trace: Mức ghi vết - 'off', 'improvements' (chỉ khi tìm được tuyến
+                tốt hơn) hoặc 'all' (mọi bước mở rộng, rất chậm)
+            trace_first: Số bước mở rộng đầu tiên giữ lại trong log, kể cả khi
+                trace='improvements' (chỉ ghi tới khi đủ, vòng lặp sau đó không
+                tốn thêm gì)
         """
+        if method not in METHODS:
+            raise ValueError(f"method phải là một trong {METHODS}, nhận được {method!r}")
+        if bound not in BOUNDS:
+            raise ValueError(f"bound phải là một trong {BOUNDS}, nhận được {bound!r}")
+        if engine not in ENGINES:
+            raise ValueError(f"engine phải là một trong {ENGINES}, nhận được {engine!r}")
+        if symmetry not in SYMMETRY_MODES:
+            raise ValueError(f"symmetry phải là một trong {SYMMETRY_MODES}, nhận được {symmetry!r}")
+        if ordering not in ORDERINGS:
+            raise ValueError(f"ordering phải là một trong {ORDERINGS}, nhận được {ordering!r}")
+        if ordering == 'bound' and bound is None:
+            raise ValueError("ordering='bound' cần chọn bound")
+        # Nguồn gửi cho tiến trình con: SharedArray chỉ gửi tên vùng nhớ/đường dẫn
+        self._matrix_source = distance_matrix
+        if isinstance(distance_matrix, tsp_distance.SharedArray):
+            distance_matrix = distance_matrix.array
+        elif isinstance(distance_matrix, tsp_distance.DistanceContainer):
+            # Quay lui và Held-Karp chỉ chạy được với n nhỏ: giải nén một lần
+            distance_matrix = distance_matrix.to_dense(np.float64)
         self.cities = cities
         self.distance_matrix = distance_matrix
+        # Bản sao list lồng nhau dùng trong vòng lặp tìm kiếm: [i][j] trên list
+        # nhanh hơn nhiều so với trên ndarray/memmap, và n ở đây luôn nhỏ
+        self._dist = np.array(distance_matrix, dtype=np.float64).tolist()
+        self.method = method
+        self.bound = bound
+        self.engine = engine
+        self.symmetry = symmetry
+        self.ordering = ordering
+        self.trace_level = parse_trace_level(trace)
         self.n_cities = len(cities)
+        self.symmetric = is_symmetric(self._dist, self.n_cities)
+        self.break_symmetry = (self.symmetric if symmetry == 'auto' else symmetry) and self.n_cities > 3
         self.best_route = None
         self.best_distance = float('inf')
         self.execution_time = 0
-        self.steps_log = []
+        self.trace = TraceBuffer(keep_first=trace_first)
+        self._trace_all = self.trace_level == TRACE_ALL
+        # Còn ghi bước mở rộng: trace='all', hoặc chưa đủ trace_first bước đầu
+        self._trace_expand = self._trace_all or bool(self.trace_level and trace_first > 0)
+        self._reset_stats()
+        self.stop_reason = None
+        self._shared_best = None
+        self._shared_nodes = None
+        self._deadline = None
+        self._node_limit = None
+        self._cancel_event = None
+        self._checkpoint_path = None
+        self._checkpoint_interval = None
+        self._next_checkpoint = None
+        self._frontier = None
+        self._frontier_top = 0
+        self._frontier_half = 0.0
+
+        self._lower_bound = None
+        if self.n_cities > 1:
+            self._prepare_bounds()
+        n = self.n_cities
+        # Láng giềng của mỗi thành phố theo khoảng cách tăng dần (không gồm 0 và chính nó)
+        self._neighbor_order = [
+            [int(c) for c in np.argsort(np.asarray(self._dist[i]), kind='stable')
+             if c != i and c != 0]
+            for i in range(n)
+        ]
+        if engine == 'iterative':
+            self._flat_distances = [value for row in self._dist for value in row]
+
+    @classmethod
+    def from_coordinates(cls, cities: List[str], coordinates, metric: str = 'euclidean',
+                         normalize: bool = False, dtype=np.float64, **kwargs) -> 'TSPBacktracking':
+        """
+        Tạo bộ giải từ tọa độ, ma trận khoảng cách tính bằng tsp_distance
+
+        Args:
+            cities: Danh sách tên các thành phố
+            coordinates: Tọa độ (lat, lon) của từng thành phố
+            metric: 'euclidean', 'haversine' hoặc 'manhattan'
+            normalize: Chuẩn hóa tọa độ về [0, 100] trước khi tính
+            dtype: Kiểu của ma trận khoảng cách
+            kwargs: Các tham số khác của TSPBacktracking
+        """
+        matrix = tsp_distance.distance_matrix(coordinates, metric=metric, normalize=normalize,
+                                              dtype=dtype)
+        return cls(cities, matrix, **kwargs)
+
+    def _prepare_bounds(self):
+        """Tiền xử lý các bảng dùng chung cho các hàm cận dưới"""
+        matrix = np.array(self._dist, dtype=np.float64)
+        np.fill_diagonal(matrix, np.inf)
+
+        min_out = matrix.min(axis=1)
+        min_in = matrix.min(axis=0)
+        if self.symmetric and self.n_cities > 2:
+            two_edges = np.partition(matrix, 1, axis=1)[:, :2].sum(axis=1)
+        else:
+            two_edges = min_out + min_in
+        self._min_out = min_out.tolist()
+        self._min_in = min_in.tolist()
+        self._half_two_edges = (two_edges / 2).tolist()
+        # Cạnh vô hướng rẻ hơn trong hai chiều, dùng cho cận MST
+        self._undirected = np.minimum(matrix, matrix.T).tolist()
+        # Tổng nửa hai cạnh của các thành phố chưa thăm, cập nhật dần trong backtrack
+        self._remaining_half = sum(self._half_two_edges[1:])
+
+        if self.bound is not None:
+            self._lower_bound = {
+                'two_edges': self._bound_two_edges,
+                'mst': self._bound_mst,
+                'reduced': self._bound_reduced,
+            }[self.bound]
+
+    def _bound_two_edges(self, last: int, unvisited: set) -> float:
+        """
+        Cận hai cạnh rẻ nhất: mỗi thành phố chưa thăm có một cạnh vào và một
+        cạnh ra, nên chi phí còn lại ít nhất bằng nửa tổng hai cạnh rẻ nhất
+        của chúng cộng nửa cạnh ra rẻ nhất của thành phố cuối và nửa cạnh vào
+        rẻ nhất của thành phố 0. Tổng được duy trì tăng dần trong backtrack.
+        """
+        return self._remaining_half + (self._min_out[last] + self._min_in[0]) / 2
+
+    def _bound_mst(self, last: int, unvisited: set) -> float:
+        """
+        Cận cây khung: đường đi qua các thành phố chưa thăm là một cây khung
+        của chúng, cộng cạnh nối rẻ nhất từ thành phố cuối và về thành phố 0
+        """
+        dist = self._dist
+        nodes = list(unvisited)
+        enter = min(dist[last][u] for u in nodes)
+        leave = min(dist[u][0] for u in nodes)
+
+        undirected = self._undirected
+        first = nodes.pop()
+        key = {u: undirected[first][u] for u in nodes}
+        tree = 0.0
+        while key:
+            u = min(key, key=key.get)
+            tree += key.pop(u)
+            row = undirected[u]
+            for v in key:
+                if row[v] < key[v]:
+                    key[v] = row[v]
+        return enter + tree + leave
+
+    def _bound_reduced(self, last: int, unvisited: set) -> float:
+        """
+        Cận ma trận rút gọn: trừ phần tử nhỏ nhất của mỗi hàng (thành phố cuối
+        và các thành phố chưa thăm) rồi của mỗi cột (các thành phố chưa thăm
+        và thành phố 0) trên ma trận con còn lại
+        """
+        dist = self._dist
+        nodes = list(unvisited)
+        rows = [last] + nodes
+        cols = nodes + [0]
+        inf = float('inf')
+
+        reduced = []
+        total = 0.0
+        for r in rows:
+            row = [inf if c == r or (r == last and c == 0) else dist[r][c] for c in cols]
+            low = min(row)
+            total += low
+            reduced.append([x - low for x in row])
+        for j in range(len(cols)):
+            total += min(row[j] for row in reduced)
+        return total
+
+    def root_lower_bound(self) -> float:
+        """Cận dưới của độ dài tuyến tối ưu: lớn nhất trong các cận tại nút gốc"""
+        n = self.n_cities
+        if n <= 3:
+            return min(self.calculate_route_distance([0] + list(order))
+                       for order in itertools.permutations(range(1, n)))
+        unvisited = set(range(1, n))
+        saved_half = self._remaining_half
+        self._remaining_half = sum(self._half_two_edges[1:])
+        lower_bound = max(self._bound_two_edges(0, unvisited), self._bound_mst(0, unvisited),
+                          self._bound_reduced(0, unvisited))
+        self._remaining_half = saved_half
+        return lower_bound
+
+    @property
+    def steps_log(self) -> TraceSteps:
+        """Log các bước, chỉ định dạng thành chuỗi khi được đọc"""
+        return TraceSteps(self.trace, self._format_event)
+
+    def _record_expand(self, a: int, b: int, distance: float, total: float) -> bool:
+        """
+        Ghi bước mở rộng a -> b: vào vùng các bước đầu tiên khi còn chỗ, vào
+        vòng khi trace='all'
+
+        Returns:
+            False khi không cần ghi các bước mở rộng sau nữa
+        """
+        if not self.trace.record_first(EVENT_EXPAND, a, b, distance, total):
+            if not self._trace_all:
+                self._trace_expand = False
+                return False
+            self.trace.record(EVENT_EXPAND, a, b, distance, total)
+        return True
+
+    def _format_event(self, record: tuple) -> str:
+        """Định dạng một sự kiện ghi vết thành dòng log"""
+        event, a, b, value, extra = record
+        if event == EVENT_EXPAND:
+            return (f"→ Đi từ {self.cities[a]} sang {self.cities[b]} "
+                    f"(khoảng cách: {value:.2f}, tích lũy: {extra:.2f})")
+        if event == EVENT_SEED:
+            return f"Nghiệm khởi tạo ({SEED_METHODS[a]}): {value:.2f}"
+        if event == EVENT_SUMMARY:
+            return f"Held-Karp: {a} trạng thái, tuyến đường tối ưu: {value:.2f}"
+        return f"Tìm tuyến đường tốt hơn: {value:.2f}"
+
+    def _reset_stats(self):
+        """
+        Đặt lại bộ đếm của cây tìm kiếm: số nút và số nhánh bị cắt theo từng
+        độ sâu (độ sâu d = d + 1 thành phố trên tuyến), mốc cải thiện nghiệm
+        """
+        n = self.n_cities
         self.explored_routes = 0
-        
+        # Dùng list thay vì array: cộng vào phần tử list nhanh hơn trong vòng lặp nóng
+        self.depth_nodes = [0] * n
+        self.depth_incumbent_prunes = [0] * n
+        self.depth_bound_prunes = [0] * n
+        self.depth_symmetry_prunes = [0] * n
+        self.improvements = []
+        self._start_time = time.time()
+        self._start_nodes = 0
+
+    @property
+    def bound_prunes(self) -> int:
+        """Số nhánh bị cắt bởi cận dưới"""
+        return sum(self.depth_bound_prunes)
+
+    @property
+    def symmetry_prunes(self) -> int:
+        """Số nhánh bị cắt do là chiều ngược của một tuyến khác"""
+        return sum(self.depth_symmetry_prunes)
+
+    def _record_improvement(self, distance: float, nodes: int):
+        """Ghi mốc (thời gian, số nút, khoảng cách) khi tìm được nghiệm tốt hơn"""
+        self.improvements.append((time.time() - self._start_time, nodes, float(distance)))
+        if self.trace_level:
+            self.trace.record(EVENT_IMPROVEMENT, value=distance)
+
+    def search_stats(self) -> dict:
+        """
+        Thống kê cây tìm kiếm từ các bộ đếm trong lúc duyệt
+
+        Returns:
+            dict: Số nút và số nhánh bị cắt (theo nghiệm tốt nhất, cận dưới,
+            đối xứng) ở mỗi độ sâu, tỉ lệ nút bị cắt theo từng nguyên nhân,
+            số lá, các mốc cải thiện nghiệm và số nút mỗi giây
+        """
+        nodes = self.explored_routes
+        prunes = {'incumbent': list(self.depth_incumbent_prunes),
+                  'bound': list(self.depth_bound_prunes),
+                  'symmetry': list(self.depth_symmetry_prunes)}
+        elapsed = self.execution_time
+        return {
+            'nodes_per_depth': list(self.depth_nodes),
+            'prunes_per_depth': prunes,
+            'prune_ratio': {cause: sum(counts) / nodes if nodes else 0.0
+                            for cause, counts in prunes.items()},
+            'leaves': self.depth_nodes[-1] if self.n_cities else 0,
+            'improvements': list(self.improvements),
+            'nodes_per_second': (nodes - self._start_nodes) / elapsed if elapsed > 0 else 0.0,
+        }
+
+    def _order_by_bound(self, last: int, unvisited) -> List[int]:
+        """Sắp xếp thành phố con theo khoảng cách tới nó cộng cận dưới của cây con"""
+        row = self._dist[last]
+        if self.bound == 'two_edges':
+            # Phần chung của cận hai cạnh giống nhau với mọi con nên bỏ qua
+            half = self._half_two_edges
+            min_out = self._min_out
+            return sorted(unvisited, key=lambda c: row[c] - half[c] + min_out[c] / 2)
+        if len(unvisited) == 1:
+            return list(unvisited)
+        lower_bound = self._lower_bound
+        return sorted(unvisited, key=lambda c: row[c] + lower_bound(c, [u for u in unvisited if u != c]))
+
     def calculate_route_distance(self, route: List[int]) -> float:
         """Tính tổng khoảng cách của một tuyến đường"""
         total_distance = 0
         for i in range(len(route) - 1):
-            total_distance += self.distance_matrix[route[i]][route[i + 1]]
+            total_distance += self._dist[route[i]][route[i + 1]]
        
-        total_distance += self.distance_matrix[route[-1]][route[0]]
+        total_distance += self._dist[route[-1]][route[0]]
         return total_distance
     
     def backtrack(self, current_route: List[int], unvisited: set, current_distance: float):
@@ -40,54 +382,636 @@ class TSPBacktracking:
             current_distance: Khoảng cách tích lũy từ đầu
         """
         self.explored_routes += 1
+        if not self.explored_routes & TICK_MASK:
+            self._on_tick()
+        depth = len(current_route) - 1
+        self.depth_nodes[depth] += 1
         
       
         if len(unvisited) == 0:
          
-            final_distance = current_distance + self.distance_matrix[current_route[-1]][current_route[0]]
+            final_distance = current_distance + self._dist[current_route[-1]][current_route[0]]
             
             if final_distance < self.best_distance:
                 self.best_distance = final_distance
                 self.best_route = current_route[:]
-                log_msg = f"Tìm tuyến đường tốt hơn: {self.best_distance:.2f}"
-                self.steps_log.append(log_msg)
+                self._record_improvement(final_distance, self.explored_routes)
             return
         
+        # Chiều ngược của một tuyến có cùng độ dài: chỉ giữ chiều đi qua
+        # thành phố 1 trước thành phố 2
+        if self.break_symmetry and current_route[-1] == 2 and 1 in unvisited:
+            self.depth_symmetry_prunes[depth] += 1
+            return
 
         if current_distance >= self.best_distance:
+            self.depth_incumbent_prunes[depth] += 1
             return
-        
-        
-        for next_city in list(unvisited):
-            distance_to_next = self.distance_matrix[current_route[-1]][next_city]
+
+        lower_bound = self._lower_bound
+        if lower_bound is not None and current_distance + lower_bound(current_route[-1], unvisited) >= self.best_distance:
+            self.depth_bound_prunes[depth] += 1
+            return
+
+        track_half = self.bound == 'two_edges'
+        trace_expand = self._trace_expand
+        if self.ordering == 'nearest':
+            children = [c for c in self._neighbor_order[current_route[-1]] if c in unvisited]
+        elif self.ordering == 'bound':
+            children = self._order_by_bound(current_route[-1], unvisited)
+        else:
+            children = list(unvisited)
+        for next_city in children:
+            distance_to_next = self._dist[current_route[-1]][next_city]
            
-            if len(self.steps_log) < 50:  
-                log_msg = f"→ Đi từ {self.cities[current_route[-1]]} sang {self.cities[next_city]} "
-                log_msg += f"(khoảng cách: {distance_to_next:.2f}, tích lũy: {current_distance + distance_to_next:.2f})"
-                self.steps_log.append(log_msg)
+            if trace_expand:
+                trace_expand = self._record_expand(current_route[-1], next_city, distance_to_next,
+                                                   current_distance + distance_to_next)
             
           
             current_route.append(next_city)
             unvisited.remove(next_city)
-            
-            
+            if track_half:
+                self._remaining_half -= self._half_two_edges[next_city]
+
+
             self.backtrack(current_route, unvisited, current_distance + distance_to_next)
-            
-            
+
+
             current_route.pop()
             unvisited.add(next_city)
+            if track_half:
+                self._remaining_half += self._half_two_edges[next_city]
+    
+    def _on_tick(self):
+        """
+        Việc định kỳ trong lúc tìm kiếm: trao đổi cận tốt nhất với các tiến
+        trình khác và kiểm tra giới hạn thời gian, số nút, yêu cầu huỷ
+        """
+        nodes = self.explored_routes
+        if self._shared_best is not None:
+            self._sync_shared_best()
+            with self._shared_nodes.get_lock():
+                self._shared_nodes.value += TICK_MASK + 1
+                nodes = self._shared_nodes.value
+        if self._checkpoint_path is not None and time.time() >= self._next_checkpoint:
+            self.save_checkpoint(self._checkpoint_path)
+            self._next_checkpoint = time.time() + self._checkpoint_interval
+        try:
+            self._check_limits(nodes)
+        except _SearchStopped:
+            # Lưu ngay trạng thái lúc dừng để lần sau tiếp tục được
+            if self._checkpoint_path is not None:
+                self.save_checkpoint(self._checkpoint_path)
+            raise
+
+    def _check_limits(self, nodes: int):
+        """Ném _SearchStopped khi vượt giới hạn thời gian, số nút hoặc bị huỷ"""
+        if self._deadline is not None and time.time() >= self._deadline:
+            raise _SearchStopped('time_limit')
+        if self._node_limit is not None and nodes >= self._node_limit:
+            raise _SearchStopped('node_limit')
+        if self._cancel_event is not None and self._cancel_event.is_set():
+            raise _SearchStopped('cancelled')
+
+    def _sync_shared_best(self):
+        """Trao đổi khoảng cách tốt nhất với các tiến trình khác qua bộ nhớ chia sẻ"""
+        shared = self._shared_best
+        with shared.get_lock():
+            if self.best_distance < shared.value:
+                shared.value = self.best_distance
+            elif shared.value < self.best_distance:
+                self.best_distance = shared.value
+
+    def _fingerprint(self) -> bytes:
+        """Dấu vân tay của ma trận khoảng cách và cấu hình, để kiểm tra checkpoint"""
+        digest = hashlib.sha256(np.asarray(self.distance_matrix, dtype=np.float64).tobytes())
+        config = self._config()
+        del config['trace']
+        digest.update(repr(sorted(config.items(), key=str)).encode())
+        return digest.digest()
+
+    def save_checkpoint(self, path: str):
+        """
+        Ghi trạng thái tìm kiếm của engine 'iterative' (ngăn xếp tiền tố, vị trí
+        con kế tiếp mỗi mức, nghiệm tốt nhất, bộ đếm) ra file nhị phân. File
+        được ghi tạm rồi đổi tên để không hỏng khi bị ngắt giữa chừng.
+        """
+        n = self.n_cities
+        route, pending, next_child, base = self._frontier
+        best_route = array('i', self.best_route if self.best_route is not None else [0] * n)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(_CHECKPOINT_HEADER.pack(CHECKPOINT_MAGIC, CHECKPOINT_VERSION,
+                                            self.best_route is not None, n, base,
+                                            self._frontier_top))
+            f.write(_CHECKPOINT_COUNTERS.pack(self.explored_routes, self.best_distance,
+                                              self._frontier_half))
+            f.write(self._fingerprint())
+            width = (n + 7) // 8
+            f.write(route.tobytes())
+            f.write(b''.join(value.to_bytes(width, 'little') for value in pending))
+            for values in (next_child, best_route):
+                f.write(values.tobytes())
+            for counts in (self.depth_nodes, self.depth_incumbent_prunes, self.depth_bound_prunes,
+                           self.depth_symmetry_prunes):
+                f.write(array('q', counts).tobytes())
+        os.replace(path + '.tmp', path)
+
+    def load_checkpoint(self, path: str) -> dict:
+        """
+        Đọc checkpoint, khôi phục nghiệm tốt nhất và bộ đếm
+
+        Returns:
+            dict: Trạng thái ngăn xếp để truyền cho search_from
+        """
+        n = self.n_cities
+        with open(path, 'rb') as f:
+            magic, version, has_best, saved_n, base, top = _CHECKPOINT_HEADER.unpack(
+                f.read(_CHECKPOINT_HEADER.size))
+            if magic != CHECKPOINT_MAGIC or version != CHECKPOINT_VERSION:
+                raise ValueError(f"{path} không phải checkpoint hợp lệ")
+            explored, best_distance, remaining_half = _CHECKPOINT_COUNTERS.unpack(
+                f.read(_CHECKPOINT_COUNTERS.size))
+            if saved_n != n or f.read(32) != self._fingerprint():
+                raise ValueError(f"Checkpoint {path} thuộc bài toán hoặc cấu hình khác")
+            width = (n + 7) // 8
+            arrays = []
+            for typecode in ('i', None, 'i', 'i', 'q', 'q', 'q', 'q'):
+                if typecode is None:
+                    data = f.read(width * n)
+                    arrays.append([int.from_bytes(data[i:i + width], 'little')
+                                   for i in range(0, width * n, width)])
+                    continue
+                values = array(typecode)
+                values.frombytes(f.read(values.itemsize * n))
+                arrays.append(values)
+        route, pending, next_child, best_route = arrays[:4]
+        (self.depth_nodes, self.depth_incumbent_prunes, self.depth_bound_prunes,
+         self.depth_symmetry_prunes) = (values.tolist() for values in arrays[4:])
+
+        if has_best and best_distance < self.best_distance:
+            self.best_distance = best_distance
+            self.best_route = list(best_route)
+        # Nút ở đỉnh ngăn xếp đã được đếm nhưng chưa được đánh giá, sẽ được đếm lại
+        self.explored_routes = explored - 1
+        self.depth_nodes[top] -= 1
+        self._start_nodes = self.explored_routes
+        return {'route': list(route[:top + 1]), 'base': base, 'pending': pending,
+                'next_child': next_child, 'remaining_half': remaining_half}
+
+    def search_from(self, prefix: List[int], resume: dict = None):
+        """
+        Quay lui trên cây con có tiền tố cố định (bắt đầu bằng thành phố 0)
+
+        Args:
+            prefix: Các thành phố đầu tiên của tuyến đường
+            resume: Trạng thái từ load_checkpoint (chỉ engine 'iterative');
+                khi có thì prefix bị bỏ qua
+        """
+        if resume is not None:
+            prefix = resume['route']
+        route = list(prefix)
+        unvisited = set(range(self.n_cities)) - set(route)
+        distance = 0
+        for i in range(len(route) - 1):
+            distance += self._dist[route[i]][route[i + 1]]
+        if self._lower_bound is not None:
+            self._remaining_half = sum(self._half_two_edges[u] for u in unvisited)
+            if resume is not None:
+                # Tổng cộng dồn lúc lưu (trước khi trừ thành phố ở đỉnh ngăn xếp):
+                # tính lại từ đầu sẽ lệch sai số làm tròn so với lần chạy liền
+                self._remaining_half = resume['remaining_half'] - self._half_two_edges[route[-1]]
+        if self.engine == 'iterative':
+            self._search_iterative(route, resume)
+        else:
+            self.backtrack(route, unvisited, distance)
+
+    def _search_iterative(self, prefix: List[int], resume: dict = None):
+        """
+        Nhân quay lui không đệ quy: ngăn xếp tường minh theo độ sâu, tập đã thăm
+        là một số nguyên bitmask, tuyến đường và tập con còn lại của mỗi mức nằm
+        trong array cấp phát sẵn, khoảng cách tra trong danh sách phẳng n*n.
+        Với ordering, mỗi mức giữ danh sách con đã sắp xếp và vị trí kế tiếp.
+
+        Args:
+            prefix: Các thành phố đầu tiên của tuyến đường (bắt đầu bằng 0)
+            resume: Trạng thái từ load_checkpoint; prefix khi đó là ngăn xếp đã
+                lưu, các mức từ base tới trước đỉnh được khôi phục vị trí con
+        """
+        n = self.n_cities
+        dist = self._flat_distances
+        full = (1 << n) - 1
+        bound = self.bound
+        lower_bound = self._lower_bound
+        if bound == 'two_edges':
+            half = self._half_two_edges
+            min_out = self._min_out
+            half_in_start = self._min_in[0] / 2
+            remaining_half = self._remaining_half
+
+        ordering = self.ordering
+        neighbor_order = self._neighbor_order
+
+        route = array('i', [0] * n)
+        # pending[d]: bitmask các thành phố con chưa thử của nút ở độ sâu d; list
+        # số nguyên Python vì với n >= 64 bitmask không vừa kiểu 'q' của array
+        pending = [0] * n
+        # level_children[d], next_child[d]: danh sách con đã sắp xếp và vị trí kế tiếp
+        level_children = [()] * n
+        next_child = array('i', [0] * n)
+        partial = array('d', [0.0] * n)
+        mask = 0
+        for depth, city in enumerate(prefix):
+            route[depth] = city
+            mask |= 1 << city
+            if depth:
+                partial[depth] = partial[depth - 1] + dist[route[depth - 1] * n + city]
+        base = top = len(prefix) - 1
+        start = route[0]
+        if resume is not None:
+            base = resume['base']
+            for depth in range(base, top):
+                pending[depth] = resume['pending'][depth]
+                next_child[depth] = resume['next_child'][depth]
+                if ordering == 'nearest':
+                    level_children[depth] = neighbor_order[route[depth]]
+                elif ordering == 'bound':
+                    level_children[depth] = self._order_by_bound(
+                        route[depth], [c for c in range(n) if c not in prefix[:depth + 1]])
+        self._frontier = (route, pending, next_child, base)
+
+        explored = self.explored_routes + 1
+        best = self.best_distance
+        depth_nodes = self.depth_nodes
+        incumbent_prunes = self.depth_incumbent_prunes
+        bound_prunes = self.depth_bound_prunes
+        symmetry_prunes = self.depth_symmetry_prunes
+        break_symmetry = self.break_symmetry
+        trace_expand = self._trace_expand
+
+        depth_nodes[top] += 1
+        if mask == full:
+            final = partial[top] + dist[route[top] * n + start]
+            if final < best:
+                best = final
+                self.best_route = list(route)
+                self._record_improvement(best, explored)
+        elif break_symmetry and mask & 4 and not mask & 2:
+            symmetry_prunes[top] += 1
+        elif partial[top] >= best:
+            incumbent_prunes[top] += 1
+        else:
+            unvisited = [c for c in range(n) if not mask >> c & 1]
+            if lower_bound is None:
+                expand = True
+            elif bound == 'two_edges':
+                # Cùng biểu thức với vòng lặp để nút ở đỉnh checkpoint được đánh giá lại y hệt
+                expand = partial[top] + remaining_half + min_out[route[top]] / 2 + half_in_start < best
+            else:
+                expand = partial[top] + lower_bound(route[top], unvisited) < best
+            if expand:
+                if ordering == 'nearest':
+                    level_children[top] = neighbor_order[route[top]]
+                elif ordering == 'bound':
+                    level_children[top] = self._order_by_bound(route[top], unvisited)
+                else:
+                    pending[top] = full ^ mask
+            else:
+                bound_prunes[top] += 1
+
+        try:
+            while True:
+                if ordering is None:
+                    rest = pending[top]
+                    if rest:
+                        low = rest & -rest
+                        pending[top] = rest ^ low
+                        city = low.bit_length() - 1
+                else:
+                    candidates = level_children[top]
+                    i = next_child[top]
+                    end = len(candidates)
+                    while i < end and mask >> candidates[i] & 1:
+                        i += 1
+                    rest = i < end
+                    if rest:
+                        next_child[top] = i + 1
+                        city = candidates[i]
+                        low = 1 << city
+                if not rest:
+                    if top == base:
+                        break
+                    city = route[top]
+                    mask ^= 1 << city
+                    if bound == 'two_edges':
+                        remaining_half += half[city]
+                    top -= 1
+                    continue
+
+                current = partial[top] + dist[route[top] * n + city]
+                if trace_expand:
+                    trace_expand = self._record_expand(route[top], city, current - partial[top],
+                                                       current)
+                top += 1
+                route[top] = city
+                partial[top] = current
+                mask |= low
+
+                explored += 1
+                depth_nodes[top] += 1
+                if not explored & TICK_MASK:
+                    self.explored_routes = explored
+                    self.best_distance = best
+                    self._frontier_top = top
+                    if bound == 'two_edges':
+                        self._frontier_half = remaining_half
+                    self._on_tick()
+                    best = self.best_distance
+
+                if mask == full:
+                    final = current + dist[city * n + start]
+                    if final < best:
+                        best = final
+                        self.best_route = list(route)
+                        self._record_improvement(best, explored)
+                elif break_symmetry and city == 2 and not mask & 2:
+                    symmetry_prunes[top] += 1
+                elif current >= best:
+                    incumbent_prunes[top] += 1
+                else:
+                    if lower_bound is None:
+                        expand = True
+                    elif bound == 'two_edges':
+                        remaining_half -= half[city]
+                        expand = current + remaining_half + min_out[city] / 2 + half_in_start < best
+                        if not expand:
+                            remaining_half += half[city]
+                    else:
+                        unvisited = [c for c in range(n) if not mask >> c & 1]
+                        expand = current + lower_bound(city, unvisited) < best
+                    if expand:
+                        if ordering == 'nearest':
+                            level_children[top] = neighbor_order[city]
+                            next_child[top] = 0
+                        elif ordering == 'bound':
+                            if bound == 'two_edges':
+                                unvisited = [c for c in range(n) if not mask >> c & 1]
+                            level_children[top] = self._order_by_bound(city, unvisited)
+                            next_child[top] = 0
+                        else:
+                            pending[top] = full ^ mask
+                        continue
+                    bound_prunes[top] += 1
+                # Lá hoặc nút bị cắt: quay lại nút cha ngay
+                mask ^= low
+                top -= 1
+        finally:
+            self.explored_routes = explored
+            self.best_distance = best
+
+    def _split_prefixes(self, workers: int) -> Tuple[List[List[int]], List[int], List[int]]:
+        """
+        Chia cây tìm kiếm thành các tiền tố độ sâu 1-3 sau thành phố 0, đủ nhiều
+        để hàng đợi của ProcessPoolExecutor chia đều việc cho các tiến trình
+
+        Returns:
+            Danh sách tiền tố (tiền tố ngắn hơn đứng trước), số nút và số nút
+            bị cắt do đối xứng ở mỗi độ sâu của phần cây đã duyệt để sinh tiền tố
+        """
+        prefixes = [[0]]
+        internal_nodes = [0] * self.n_cities
+        symmetry_prunes = [0] * self.n_cities
+        depth = 0
+        while len(prefixes) < workers * 4 and depth < 3 and depth < self.n_cities - 2:
+            internal_nodes[depth] += len(prefixes)
+            children = [prefix + [city] for prefix in prefixes
+                        for city in range(1, self.n_cities) if city not in prefix]
+            depth += 1
+            # Tiền tố đi qua 2 trước 1 vẫn là một nút bị cắt, đếm như tìm kiếm tuần tự
+            prefixes = [prefix for prefix in children
+                        if not (self.break_symmetry and prefix[-1] == 2 and 1 not in prefix)]
+            internal_nodes[depth] += len(children) - len(prefixes)
+            symmetry_prunes[depth] += len(children) - len(prefixes)
+        prefixes.sort(key=lambda prefix: sum(self._dist[prefix[i]][prefix[i + 1]]
+                                             for i in range(len(prefix) - 1)))
+        return prefixes, internal_nodes, symmetry_prunes
+
+    def _solve_parallel(self, workers: int) -> int:
+        """
+        Giải song song: mỗi tiền tố là một đơn vị việc gửi tới ProcessPoolExecutor,
+        cận tốt nhất và số nút đã duyệt được chia sẻ qua multiprocessing.Value,
+        yêu cầu dừng qua multiprocessing.Event
+
+        Returns:
+            Số đơn vị việc
+        """
+        prefixes, internal_nodes, symmetry_prunes = self._split_prefixes(workers)
+        self.explored_routes += sum(internal_nodes)
+        for depth in range(self.n_cities):
+            self.depth_nodes[depth] += internal_nodes[depth]
+            self.depth_symmetry_prunes[depth] += symmetry_prunes[depth]
+        shared_best = multiprocessing.Value('d', self.best_distance)
+        shared_nodes = multiprocessing.Value('q', self.explored_routes)
+        stop_event = multiprocessing.Event()
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(self.cities, self._matrix_source, self._config(),
+                                           shared_best, shared_nodes, stop_event,
+                                           self._deadline, self._node_limit)) as executor:
+            pending = {executor.submit(_search_prefix, prefix) for prefix in prefixes}
+            while pending:
+                done, pending = wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.cancelled():
+                        continue
+                    route, distance, explored, counters, reason = future.result()
+                    self.explored_routes += explored
+                    for totals, counts in zip((self.depth_nodes, self.depth_incumbent_prunes,
+                                               self.depth_bound_prunes, self.depth_symmetry_prunes),
+                                              counters):
+                        for depth, count in enumerate(counts):
+                            totals[depth] += count
+                    if reason is not None and self.stop_reason is None:
+                        self.stop_reason = reason
+                    if route is not None and distance < self.best_distance:
+                        self.best_distance = distance
+                        self.best_route = route
+                        self._record_improvement(distance, self.explored_routes)
+                if self.stop_reason is None:
+                    try:
+                        self._check_limits(shared_nodes.value)
+                    except _SearchStopped as stopped:
+                        self.stop_reason = stopped.reason
+                if self.stop_reason is not None:
+                    stop_event.set()
+                    for future in pending:
+                        future.cancel()
+        return len(prefixes)
+
+    def held_karp(self, chunk_size: int = 1 << 16):
+        """
+        Quy hoạch động Held-Karp trên (tập đã thăm, thành phố cuối)
+        
+        Thành phố 0 cố định là điểm xuất phát, các thành phố 1..n-1 ứng với
+        bit 0..n-2 của mask. Mỗi lớp (số bit bật) được tính bằng phép toán
+        vector NumPy; bảng chi phí dùng float32, bảng truy vết dùng int16.
+        
+        Args:
+            chunk_size: Số mask xử lý trong một lần để giới hạn bộ nhớ tạm
+        """
+        n = self.n_cities
+        if n == 1:
+            self.best_route = [0]
+            self.best_distance = self.calculate_route_distance([0])
+            self.explored_routes = 1
+            self.depth_nodes[0] = 1
+            return
+        
+        m = n - 1
+        full = 1 << m
+        dist = np.asarray(self.distance_matrix, dtype=np.float64)
+        inner = dist[1:, 1:].astype(np.float32)
+        
+        cost = np.full((full, m), np.inf, dtype=np.float32)
+        parent = np.full((full, m), -1, dtype=np.int16)
+        singles = 1 << np.arange(m)
+        cost[singles, np.arange(m)] = dist[0, 1:]
+        
+        masks = np.arange(full, dtype=np.int64)
+        popcount = np.zeros(full, dtype=np.int8)
+        for bit in range(m):
+            popcount += ((masks >> bit) & 1).astype(np.int8)
+        
+        for size in range(2, m + 1):
+            self._check_limits(0)
+            layer = masks[popcount == size]
+            for j in range(m):
+                bit = 1 << j
+                targets = layer[(layer & bit) != 0]
+                for start in range(0, len(targets), chunk_size):
+                    chunk = targets[start:start + chunk_size]
+                    # cost[prev, k] = inf với k không thuộc prev nên không cần lọc thêm
+                    candidates = cost[chunk ^ bit] + inner[:, j]
+                    best_k = np.argmin(candidates, axis=1)
+                    cost[chunk, j] = candidates[np.arange(len(chunk)), best_k]
+                    parent[chunk, j] = best_k
+        
+        closing = cost[full - 1] + dist[1:, 0].astype(np.float32)
+        last = int(np.argmin(closing))
+        
+        route = []
+        mask = full - 1
+        while last >= 0:
+            route.append(last + 1)
+            prev = int(parent[mask, last])
+            mask ^= 1 << last
+            last = prev
+        route.append(0)
+        route.reverse()
+        
+        self.best_route = route
+        # Tính lại bằng float64 để tránh sai số tích luỹ của bảng float32
+        self.best_distance = self.calculate_route_distance(route)
+        self.explored_routes = m * (full >> 1)
+        # Lớp k (k thành phố ngoài 0) có C(m, k) tập, mỗi tập k thành phố cuối
+        for size in range(1, m + 1):
+            self.depth_nodes[size] = math.comb(m, size) * size
+        self.improvements.append((time.time() - self._start_time, self.explored_routes,
+                                  float(self.best_distance)))
+        if self.trace_level:
+            self.trace.record(EVENT_SUMMARY, self.explored_routes, value=self.best_distance)
     
-    def solve(self, verbose: bool = False) -> dict:
+    def _config(self) -> dict:
+        """Tham số khởi tạo của bộ giải, dùng để tạo bản sao"""
+        return {'method': self.method, 'bound': self.bound, 'engine': self.engine,
+                'symmetry': self.symmetry, 'ordering': self.ordering,
+                'trace': self.trace_level}
+
+    def _clone(self) -> 'TSPBacktracking':
+        """Tạo một bộ giải mới cùng cấu hình, chưa có kết quả"""
+        return TSPBacktracking(self.cities, self._matrix_source, **self._config())
+
+    def seed_incumbent(self, warm_start: str = None, initial_route: List[int] = None) -> dict:
+        """
+        Khởi tạo nghiệm tốt nhất hiện tại trước khi quay lui để việc cắt nhánh
+        có hiệu lực ngay từ đầu
+
+        Args:
+            warm_start: 'nearest_neighbor', 'greedy_edge' hoặc 'two_opt'
+                (láng giềng gần nhất rồi cải thiện bằng 2-opt)
+            initial_route: Tuyến đường cho trước (danh sách index thành phố),
+                được ưu tiên hơn warm_start
+
+        Returns:
+            dict: Phương pháp và khoảng cách của nghiệm khởi tạo
+        """
+        n = self.n_cities
+        if initial_route is not None:
+            route = list(initial_route)
+            if sorted(route) != list(range(n)):
+                raise ValueError("initial_route phải là một hoán vị của các index thành phố")
+            method = 'initial_route'
+        else:
+            if warm_start not in WARM_STARTS:
+                raise ValueError(f"warm_start phải là một trong {WARM_STARTS}, nhận được {warm_start!r}")
+            if warm_start == 'greedy_edge':
+                route = greedy_edge_route(self._dist, n)
+            else:
+                route = nearest_neighbor_route(self._dist, n)
+            if warm_start == 'two_opt':
+                route = two_opt(route, self._dist, self.symmetric)
+            method = warm_start
+
+        route = rotate_to_start(route, 0)
+        distance = self.calculate_route_distance(route)
+        if distance < self.best_distance:
+            self.best_distance = distance
+            self.best_route = route
+            self.improvements.append((time.time() - self._start_time, self.explored_routes,
+                                      float(distance)))
+        if self.trace_level:
+            self.trace.record(EVENT_SEED, SEED_METHODS.index(method), value=distance)
+        return {'method': method, 'distance': distance}
+
+    def solve(self, verbose: bool = False, warm_start: str = None,
+              initial_route: List[int] = None, measure_savings: bool = False,
+              workers: int = None, time_limit: float = None, node_limit: int = None,
+              cancel_event=None, checkpoint_path: str = None,
+              checkpoint_interval: float = 60.0, resume: bool = True) -> dict:
         """
         Giải bài toán TSP bằng Backtracking
         
         Args:
             verbose: In chi tiết các bước
+            warm_start: Heuristic tạo nghiệm ban đầu trước khi quay lui
+                ('nearest_neighbor', 'greedy_edge', 'two_opt')
+            initial_route: Tuyến đường cho trước dùng làm nghiệm ban đầu
+            measure_savings: Giải thêm một lần không có nghiệm ban đầu để đếm
+                số nút mà nghiệm ban đầu tiết kiệm được
+            workers: Số tiến trình chạy song song các cây con (None hoặc 1: tuần tự)
+            time_limit: Giới hạn thời gian (giây); hết giờ thì trả về nghiệm tốt nhất hiện có
+            node_limit: Giới hạn số nút duyệt (kiểm tra mỗi TICK_MASK + 1 nút)
+            cancel_event: threading.Event hoặc multiprocessing.Event; khi được set
+                thì dừng tìm kiếm
+            checkpoint_path: File checkpoint nhị phân (cần engine 'iterative',
+                không song song); được ghi định kỳ và khi dừng sớm, bị xoá khi
+                tìm kiếm hoàn tất
+            checkpoint_interval: Số giây giữa hai lần ghi checkpoint
+            resume: Tiếp tục từ checkpoint_path nếu file đã tồn tại
             
         Returns:
             dict: Kết quả gồm tuyến đường, khoảng cách, thời gian, log
         """
         start_time = time.time()
+        if checkpoint_path is not None and (self.engine != 'iterative' or self.method != 'backtracking'
+                                            or (workers is not None and workers > 1)):
+            raise ValueError("checkpoint chỉ hỗ trợ method='backtracking', engine='iterative', chạy tuần tự")
+        self._deadline = start_time + time_limit if time_limit is not None else None
+        self._node_limit = node_limit
+        self._cancel_event = cancel_event
+        self.stop_reason = None
+        self._start_time = start_time
+        self._start_nodes = self.explored_routes
         
         if verbose:
             print(f"\n{'='*70}")
@@ -95,18 +1019,70 @@ class TSPBacktracking:
             print(f"{'='*70}")
             print(f"Số thành phố: {self.n_cities}")
             print(f"Danh sách thành phố: {', '.join(self.cities)}")
-            print(f"Phương pháp: Quay lui (Backtracking)")
-            print(f"Độ phức tạp: O(n!) - Tất cả các hoán vị")
+            if self.method == 'held_karp':
+                print(f"Phương pháp: Quy hoạch động Held-Karp")
+                print(f"Độ phức tạp: O(n²·2ⁿ) - Tất cả các tập con")
+            else:
+                print(f"Phương pháp: Quay lui (Backtracking)")
+                print(f"Độ phức tạp: O(n!) - Tất cả các hoán vị")
             print(f"{'='*70}\n")
         
-   
-        initial_route = [0]
-        unvisited = set(range(1, self.n_cities))
+        seed_info = None
+        work_units = None
+        resumed = False
+        try:
+            if self.method == 'held_karp':
+                self.held_karp()
+            else:
+                if warm_start is not None or initial_route is not None:
+                    seed_start = time.time()
+                    seed_info = self.seed_incumbent(warm_start, initial_route)
+                    seed_info['time'] = time.time() - seed_start
+                    if verbose:
+                        print(f"Nghiệm khởi tạo ({seed_info['method']}): {seed_info['distance']:.2f} km")
+                
+                if workers is not None and workers > 1 and self.n_cities > 3:
+                    work_units = self._solve_parallel(workers)
+                elif checkpoint_path is not None:
+                    self._checkpoint_path = checkpoint_path
+                    self._checkpoint_interval = checkpoint_interval
+                    self._next_checkpoint = time.time() + checkpoint_interval
+                    state = None
+                    if resume and os.path.exists(checkpoint_path):
+                        state = self.load_checkpoint(checkpoint_path)
+                        resumed = True
+                        if verbose:
+                            print(f"Tiếp tục từ checkpoint {checkpoint_path} "
+                                  f"({self.explored_routes} nút đã duyệt)")
+                    self.search_from([0], state)
+                    if os.path.exists(checkpoint_path):
+                        os.remove(checkpoint_path)
+                else:
+                    self.search_from([0])
+        except _SearchStopped as stopped:
+            self.stop_reason = stopped.reason
+        finally:
+            self._deadline = self._node_limit = self._cancel_event = None
+            self._checkpoint_path = None
         
-        self.backtrack(initial_route, unvisited, 0)
+        optimal = self.stop_reason is None
+        if self.best_route is None:
+            # Dừng trước khi có nghiệm nào: dùng láng giềng gần nhất
+            self.best_route = nearest_neighbor_route(self._dist, self.n_cities)
+            self.best_distance = self.calculate_route_distance(self.best_route)
+        lower_bound = self.best_distance if optimal else min(self.root_lower_bound(), self.best_distance)
+        gap = (self.best_distance - lower_bound) / self.best_distance * 100 if self.best_distance > 0 else 0.0
         
         self.execution_time = time.time() - start_time
         
+        if seed_info is not None:
+            seed_info['gap'] = (seed_info['distance'] - self.best_distance) / self.best_distance * 100 if self.best_distance > 0 else 0.0
+            seed_info['nodes_saved'] = None
+            if measure_savings:
+                baseline = self._clone()
+                baseline.solve()
+                seed_info['nodes_saved'] = baseline.explored_routes - self.explored_routes
+        
        
         best_route_names = [self.cities[i] for i in self.best_route]
         
@@ -116,13 +1092,72 @@ class TSPBacktracking:
             print(f"Tổng khoảng cách: {self.best_distance:.2f} km")
             print(f"Thời gian thực thi: {self.execution_time:.4f} giây")
             print(f"Số tuyến đường khám phá: {self.explored_routes}")
+            stats = self.search_stats()
+            print(f"Số lá: {stats['leaves']}, tốc độ: {stats['nodes_per_second']:.0f} nút/giây")
+            if not optimal:
+                print(f"Dừng sớm ({self.stop_reason}), cận dưới: {lower_bound:.2f} km, gap: {gap:.2f}%")
+            if self.bound is not None:
+                print(f"Số nhánh bị cắt bởi cận dưới ({self.bound}): {self.bound_prunes}")
+            if seed_info is not None and seed_info['nodes_saved'] is not None:
+                print(f"Số nút tiết kiệm nhờ nghiệm khởi tạo: {seed_info['nodes_saved']}")
             print(f"{'='*70}\n")
         
         return {
             'route': best_route_names,
             'distance': self.best_distance,
             'time': self.execution_time,
-            'algorithm': 'Backtracking (Quay lui)',
+            'algorithm': ALGORITHM_NAMES[self.method],
             'explored_routes': self.explored_routes,
+            'bound': self.bound,
+            'bound_prunes': self.bound_prunes,
+            'symmetry_breaking': self.break_symmetry,
+            'symmetry_prunes': self.symmetry_prunes,
+            'warm_start': seed_info,
+            'workers': workers if work_units is not None else 1,
+            'work_units': work_units,
+            'optimal': optimal,
+            'stop_reason': self.stop_reason,
+            'lower_bound': lower_bound,
+            'gap': gap,
+            'resumed': resumed,
+            'stats': self.search_stats(),
             'steps': self.steps_log
-        }
\ No newline at end of file
+        }
+
+
+_WORKER_SOLVER = None
+
+
+def _init_worker(cities: List[str], distance_matrix, config: dict, shared_best, shared_nodes,
+                 stop_event, deadline: float, node_limit: int):
+    """Khởi tạo một bộ giải cho mỗi tiến trình con, dùng lại cho mọi đơn vị việc"""
+    global _WORKER_SOLVER
+    _WORKER_SOLVER = TSPBacktracking(cities, distance_matrix, **dict(config, trace='off'))
+    _WORKER_SOLVER._shared_best = shared_best
+    _WORKER_SOLVER._shared_nodes = shared_nodes
+    _WORKER_SOLVER._cancel_event = stop_event
+    _WORKER_SOLVER._deadline = deadline
+    _WORKER_SOLVER._node_limit = node_limit
+
+
+def _search_prefix(prefix: List[int]) -> tuple:
+    """Quay lui trên cây con của một tiền tố trong tiến trình con"""
+    solver = _WORKER_SOLVER
+    solver.best_route = None
+    solver._reset_stats()
+    solver.trace.clear()
+    solver.best_distance = solver._shared_best.value
+    reason = None
+    try:
+        solver._check_limits(solver._shared_nodes.value)
+        solver.search_from(prefix)
+    except _SearchStopped as stopped:
+        reason = stopped.reason
+    solver._sync_shared_best()
+
+    distance = float('inf')
+    if solver.best_route is not None:
+        distance = solver.calculate_route_distance(solver.best_route)
+    counters = (solver.depth_nodes, solver.depth_incumbent_prunes, solver.depth_bound_prunes,
+                solver.depth_symmetry_prunes)
+    return solver.best_route, distance, solver.explored_routes, counters, reason
@@ -0,0 +1,706 @@
+"""
+Travelling Salesman Problem - Distance
+Tính ma trận khoảng cách từ tọa độ bằng phép broadcast của NumPy, theo từng
+khối hàng để bộ nhớ tạm không vượt quá một ngưỡng cố định
+"""
+
+import itertools
+import math
+import os
+from collections import OrderedDict
+from multiprocessing import shared_memory
+
+import numpy as np
+
+METRICS = ('euclidean', 'haversine', 'manhattan')
+# Bán kính trung bình của Trái Đất (km), dùng cho haversine
+EARTH_RADIUS_KM = 6371.0088
+# Số phần tử tối đa của mỗi khối hàng khi không chỉ định chunk_size
+DEFAULT_BLOCK_ELEMENTS = 1 << 22
+# Bộ nhớ tối đa (byte) cho các hàng được lưu lại của DistanceOracle
+DEFAULT_CACHE_BYTES = 64 << 20
+# Vùng nhớ chia sẻ đang gắn trong tiến trình này, giữ sống tới khi close():
+# mảng NumPy trỏ thẳng vào vùng nhớ nên không được để SharedMemory bị thu gom
+_ATTACHED_MEMORY = {}
+
+
+def normalize_coordinates(coordinates, scale: float = 100.0) -> np.ndarray:
+    """
+    Chuẩn hóa tọa độ (lat, lon) về khoảng [0, scale] theo từng trục; trục
+    không biến thiên được chia cho 1
+
+    Args:
+        coordinates: Danh sách hoặc mảng n×2 các cặp (lat, lon)
+        scale: Giá trị lớn nhất sau chuẩn hóa
+    """
+    coords = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    if not len(coords):
+        return coords
+    low, high = coords.min(axis=0), coords.max(axis=0)
+    span = np.where(high > low, high - low, 1.0)
+    return (coords - low) / span * scale
+
+
+def pairwise_distances(source, target, metric: str = 'euclidean') -> np.ndarray:
+    """
+    Khoảng cách từ mỗi điểm của source tới mỗi điểm của target (len(source) × len(target))
+
+    Args:
+        source: Mảng m×2 tọa độ
+        target: Mảng n×2 tọa độ
+        metric: 'euclidean', 'haversine' (tọa độ (lat, lon) theo độ, kết quả
+            theo km) hoặc 'manhattan'
+    """
+    source = np.asarray(source, dtype=np.float64).reshape(-1, 2)
+    target = np.asarray(target, dtype=np.float64).reshape(-1, 2)
+    return paired_distances(source[:, None, :], target[None, :, :], metric)
+
+
+def paired_distances(source, target, metric: str = 'euclidean') -> np.ndarray:
+    """
+    Khoảng cách giữa từng cặp điểm tương ứng của source và target (hai mảng
+    tọa độ ...×2 được broadcast với nhau)
+
+    Args:
+        source: Mảng tọa độ, trục cuối là (lat, lon) / (x, y)
+        target: Mảng tọa độ cùng dạng
+        metric: 'euclidean', 'haversine' hoặc 'manhattan'
+    """
+    source = np.asarray(source, dtype=np.float64)
+    target = np.asarray(target, dtype=np.float64)
+    if metric in ('euclidean', 'manhattan'):
+        # Tính tại chỗ trên hai mảng tạm; nhanh hơn np.hypot vài lần
+        dx = source[..., 0] - target[..., 0]
+        dy = source[..., 1] - target[..., 1]
+        if metric == 'manhattan':
+            np.abs(dx, out=dx)
+            np.abs(dy, out=dy)
+            dx += dy
+            return dx
+        dx *= dx
+        dy *= dy
+        dx += dy
+        return np.sqrt(dx, out=dx)
+    if metric == 'haversine':
+        lat1, lon1 = np.radians(source[..., 0]), np.radians(source[..., 1])
+        lat2, lon2 = np.radians(target[..., 0]), np.radians(target[..., 1])
+        a = (np.sin((lat2 - lat1) / 2) ** 2
+             + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+    raise ValueError(f"metric phải là một trong {METRICS}, nhận được {metric!r}")
+
+
+def distance_matrix(coordinates, metric: str = 'euclidean', normalize: bool = False,
+                    dtype=np.float64, chunk_size: int = None, out: np.ndarray = None) -> np.ndarray:
+    """
+    Ma trận khoảng cách n×n giữa các tọa độ, tính theo từng khối chunk_size
+    hàng: bộ nhớ tạm O(chunk_size × n) thay vì O(n²) cho mỗi phép toán trung gian
+
+    Args:
+        coordinates: Danh sách hoặc mảng n×2 các cặp (lat, lon) / (x, y)
+        metric: 'euclidean', 'haversine' hoặc 'manhattan'
+        normalize: Chuẩn hóa tọa độ về [0, 100] trước khi tính (không dùng với haversine)
+        dtype: Kiểu của ma trận kết quả, np.float32 để giảm một nửa bộ nhớ
+        chunk_size: Số hàng mỗi khối (None: tự chọn theo DEFAULT_BLOCK_ELEMENTS)
+        out: Mảng n×n có sẵn để ghi kết quả (ví dụ np.memmap)
+
+    Returns:
+        np.ndarray: Ma trận khoảng cách
+    """
+    if metric not in METRICS:
+        raise ValueError(f"metric phải là một trong {METRICS}, nhận được {metric!r}")
+    if normalize and metric == 'haversine':
+        raise ValueError("haversine cần tọa độ (lat, lon) gốc, không chuẩn hóa")
+    coords = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    if normalize:
+        coords = normalize_coordinates(coords)
+    n = len(coords)
+    if out is None:
+        out = np.empty((n, n), dtype=dtype)
+    elif out.shape != (n, n):
+        raise ValueError(f"out phải có kích thước {(n, n)}, nhận được {out.shape}")
+    if chunk_size is None:
+        chunk_size = max(1, DEFAULT_BLOCK_ELEMENTS // max(n, 1))
+    elif chunk_size < 1:
+        raise ValueError("chunk_size phải là số nguyên dương")
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        out[start:stop] = pairwise_distances(coords[start:stop], coords, metric)
+    return out
+
+
+def nearest_neighbors(distances, k: int) -> np.ndarray:
+    """
+    k thành phố gần nhất của mỗi thành phố (không gồm chính nó), tăng dần theo
+    khoảng cách. Duyệt theo khối hàng nên bộ nhớ tạm có giới hạn, thời gian O(n²).
+
+    Args:
+        distances: Ma trận khoảng cách (ndarray, list lồng nhau hoặc DistanceContainer)
+        k: Số láng giềng, 1 <= k < n
+    """
+    if not isinstance(distances, DistanceContainer):
+        distances = np.asarray(distances)
+    n = len(distances)
+    result = np.empty((n, k), dtype=np.intp)
+    block = max(1, DEFAULT_BLOCK_ELEMENTS // max(n, 1))
+    for start in range(0, n if k else 0, block):
+        cities = np.arange(start, min(start + block, n))
+        rows = np.array(distances[cities], dtype=np.float64)
+        rows[np.arange(len(cities)), cities] = np.inf
+        nearest = np.argpartition(rows, k - 1, axis=1)[:, :k]
+        order = np.argsort(np.take_along_axis(rows, nearest, axis=1), axis=1, kind='stable')
+        result[cities] = np.take_along_axis(nearest, order, axis=1)
+    return result
+
+
+def _nearest_among(points, queries, candidates, k: int, metric: str):
+    """
+    k điểm gần nhất trong candidates của mỗi điểm trong queries (bỏ qua chính
+    nó), xét theo khối hàng × khối cột để mảng tạm không vượt quá
+    DEFAULT_BLOCK_ELEMENTS phần tử dù một ô lưới chứa bao nhiêu điểm
+
+    Args:
+        points: Mảng tọa độ n×d
+        queries: Chỉ số các điểm cần tìm láng giềng
+        candidates: Chỉ số các điểm được xét, nhiều hơn k điểm
+        k: Số láng giềng
+        metric: 'euclidean' hoặc 'manhattan'
+
+    Returns:
+        (len(queries)×k chỉ số láng giềng chưa sắp xếp, khoảng cách tới láng giềng thứ k)
+    """
+    dims = points.shape[1]
+    columns = max(k, DEFAULT_BLOCK_ELEMENTS // dims)
+    block = max(1, DEFAULT_BLOCK_ELEMENTS // (dims * min(len(candidates), columns)))
+    nearest = np.empty((len(queries), k), dtype=np.intp)
+    kth = np.empty(len(queries))
+    for start in range(0, len(queries), block):
+        rows = queries[start:start + block]
+        best_index = np.empty((len(rows), 0), dtype=np.intp)
+        best_distance = np.empty((len(rows), 0))
+        for first in range(0, len(candidates), columns):
+            others = candidates[first:first + columns]
+            difference = np.abs(points[rows][:, None] - points[others][None])
+            if metric == 'manhattan':
+                distances = difference.sum(axis=2)
+            else:
+                distances = np.sqrt((difference * difference).sum(axis=2))
+            distances[rows[:, None] == others[None]] = np.inf
+            # Gộp với k điểm tốt nhất của các khối cột trước rồi chỉ giữ lại k
+            best_distance = np.hstack((best_distance, distances))
+            best_index = np.hstack((best_index, np.broadcast_to(others, distances.shape)))
+            if best_distance.shape[1] > k:
+                keep = np.argpartition(best_distance, k - 1, axis=1)[:, :k]
+                best_distance = np.take_along_axis(best_distance, keep, axis=1)
+                best_index = np.take_along_axis(best_index, keep, axis=1)
+        nearest[start:start + len(rows)] = best_index
+        kth[start:start + len(rows)] = best_distance.max(axis=1)
+    return nearest, kth
+
+
+class DistanceContainer:
+    """
+    Giao diện chung của các nguồn khoảng cách đối xứng không lưu ma trận n×n.
+    Dùng được như ma trận NumPy trong các bộ giải: matrix[i] là hàng i,
+    matrix[rows, cols] lấy nhiều phần tử cùng lúc, matrix.item(i, j) trả về
+    float. Lớp con cài đặt item, row và take.
+    """
+
+    n = 0
+
+    def item(self, i: int, j: int) -> float:
+        """Khoảng cách d(i, j) dạng float"""
+        raise NotImplementedError
+
+    def row(self, i: int) -> np.ndarray:
+        """Khoảng cách từ i tới mọi thành phố"""
+        raise NotImplementedError
+
+    def take(self, rows, columns) -> np.ndarray:
+        """Khoảng cách của các cặp (rows, columns), hai mảng chỉ số được broadcast"""
+        raise NotImplementedError
+
+    def d(self, i: int, j: int) -> float:
+        return self.item(i, j)
+
+    @property
+    def shape(self) -> tuple:
+        return (self.n, self.n)
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            if len(key) != 2:
+                raise IndexError("cần đúng hai chỉ số (hàng, cột)")
+            if np.ndim(key[0]) == 0 and np.ndim(key[1]) == 0:
+                return self.item(int(key[0]), int(key[1]))
+            return self.take(*key)
+        if np.ndim(key) == 0:
+            return self.row(int(key))
+        rows = np.asarray(key, dtype=np.intp)
+        return self.take(rows[..., None], np.arange(self.n))
+
+    def __iter__(self):
+        for i in range(self.n):
+            yield self.row(i)
+
+    def to_dense(self, dtype=None) -> np.ndarray:
+        """Ma trận n×n đầy đủ (cần O(n²) bộ nhớ)"""
+        dense = np.empty((self.n, self.n), dtype=dtype or self.dtype)
+        for i in range(self.n):
+            dense[i] = self.row(i)
+        return dense
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        return self.to_dense(dtype)
+
+
+class CondensedDistanceMatrix(DistanceContainer):
+    """
+    Ma trận khoảng cách đối xứng chỉ lưu n(n-1)/2 phần tử phía trên đường
+    chéo trong một mảng phẳng (cùng thứ tự với scipy.spatial.distance.squareform):
+    cặp i < j nằm ở vị trí i*(2n-i-1)/2 + (j-i-1). Đường chéo luôn bằng 0.
+    """
+
+    def __init__(self, data, n: int):
+        """
+        Args:
+            data: Mảng phẳng n(n-1)/2 khoảng cách phía trên đường chéo (có thể
+                là SharedArray để tiến trình con dùng chung, không sao chép)
+            n: Số thành phố
+        """
+        self._shared = data if isinstance(data, SharedArray) else None
+        data = np.asarray(data)
+        if data.ndim != 1 or len(data) != n * (n - 1) // 2:
+            raise ValueError(f"data phải là mảng phẳng {n * (n - 1) // 2} phần tử, "
+                             f"nhận được kích thước {data.shape}")
+        self.data = data
+        self.n = n
+        index = np.arange(n, dtype=np.int64)
+        # Vị trí của cặp (i, i + 1) trong data
+        self._offsets = index * (2 * n - index - 1) // 2
+        self._offset_list = self._offsets.tolist()
+
+    @classmethod
+    def from_matrix(cls, matrix, dtype=np.float64) -> 'CondensedDistanceMatrix':
+        """Nén một ma trận n×n đối xứng (chỉ đọc phần phía trên đường chéo)"""
+        n = len(matrix)
+        data = np.empty(n * (n - 1) // 2, dtype=dtype)
+        position = 0
+        for i in range(n - 1):
+            data[position:position + n - i - 1] = np.asarray(matrix[i], dtype=np.float64)[i + 1:]
+            position += n - i - 1
+        return cls(data, n)
+
+    @classmethod
+    def from_coordinates(cls, coordinates, metric: str = 'euclidean', normalize: bool = False,
+                         dtype=np.float64, chunk_size: int = None) -> 'CondensedDistanceMatrix':
+        """
+        Tính trực tiếp dạng nén từ tọa độ theo từng khối hàng, không tạo ma trận n×n
+
+        Args:
+            coordinates: Danh sách hoặc mảng n×2 tọa độ
+            metric: 'euclidean', 'haversine' hoặc 'manhattan'
+            normalize: Chuẩn hóa tọa độ về [0, 100] trước khi tính
+            dtype: Kiểu phần tử, np.float32 để giảm một nửa bộ nhớ
+            chunk_size: Số hàng mỗi khối (None: tự chọn theo DEFAULT_BLOCK_ELEMENTS)
+        """
+        if metric not in METRICS:
+            raise ValueError(f"metric phải là một trong {METRICS}, nhận được {metric!r}")
+        coords = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+        if normalize:
+            coords = normalize_coordinates(coords)
+        n = len(coords)
+        if chunk_size is None:
+            chunk_size = max(1, DEFAULT_BLOCK_ELEMENTS // max(n, 1))
+        data = np.empty(n * (n - 1) // 2, dtype=dtype)
+        position = 0
+        for start in range(0, n - 1, chunk_size):
+            stop = min(start + chunk_size, n - 1)
+            block = pairwise_distances(coords[start:stop], coords, metric)
+            for i in range(start, stop):
+                data[position:position + n - i - 1] = block[i - start, i + 1:]
+                position += n - i - 1
+        return cls(data, n)
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.data.dtype
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes
+
+    def item(self, i: int, j: int) -> float:
+        """Khoảng cách d(i, j) dạng float, O(1)"""
+        if i == j:
+            return 0.0
+        if i > j:
+            i, j = j, i
+        return self.data.item(self._offset_list[i] + j - i - 1)
+
+    def row(self, i: int) -> np.ndarray:
+        """Hàng i dạng ndarray: phần sau đường chéo là một đoạn liên tục của data"""
+        n = self.n
+        row = np.empty(n, dtype=self.data.dtype)
+        before = np.arange(i)
+        row[:i] = self.data[self._offsets[:i] + (i - before - 1)]
+        row[i] = 0
+        start = self._offset_list[i]
+        row[i + 1:] = self.data[start:start + n - i - 1]
+        return row
+
+    def take(self, rows, columns) -> np.ndarray:
+        """Khoảng cách của các cặp (rows, columns), hai mảng chỉ số được broadcast"""
+        rows, columns = np.broadcast_arrays(np.asarray(rows, dtype=np.intp),
+                                            np.asarray(columns, dtype=np.intp))
+        low, high = np.minimum(rows, columns), np.maximum(rows, columns)
+        values = self.data[self._offsets[low] + (high - low - 1)]
+        values[low == high] = 0
+        return values
+
+    def to_dense(self, dtype=None) -> np.ndarray:
+        """Ma trận n×n đầy đủ"""
+        n = self.n
+        dense = np.zeros((n, n), dtype=dtype or self.data.dtype)
+        for i in range(n - 1):
+            start = self._offset_list[i]
+            dense[i, i + 1:] = self.data[start:start + n - i - 1]
+            dense[i + 1:, i] = dense[i, i + 1:]
+        return dense
+
+    def __getstate__(self) -> dict:
+        return {'data': self._shared if self._shared is not None else self.data, 'n': self.n}
+
+    def __setstate__(self, state: dict):
+        self.__init__(state['data'], state['n'])
+
+    def __repr__(self) -> str:
+        return f"CondensedDistanceMatrix(n={self.n}, dtype={self.data.dtype})"
+
+
+class DistanceOracle(DistanceContainer):
+    """
+    Khoảng cách tính theo yêu cầu từ tọa độ, không bao giờ lưu ma trận n×n:
+    item(i, j) tính trực tiếp trong O(1), các hàng đã tính được giữ trong bộ
+    đệm LRU giới hạn theo số byte (hàng dùng lâu nhất bị loại trước).
+    """
+
+    def __init__(self, coordinates, metric: str = 'euclidean', normalize: bool = False,
+                 dtype=np.float64, max_cache_bytes: int = DEFAULT_CACHE_BYTES):
+        """
+        Args:
+            coordinates: Danh sách hoặc mảng n×2 tọa độ
+            metric: 'euclidean', 'haversine' hoặc 'manhattan'
+            normalize: Chuẩn hóa tọa độ về [0, 100] trước khi tính
+            dtype: Kiểu của các hàng trả về và lưu trong bộ đệm
+            max_cache_bytes: Bộ nhớ tối đa của bộ đệm hàng (0: không lưu)
+        """
+        if metric not in METRICS:
+            raise ValueError(f"metric phải là một trong {METRICS}, nhận được {metric!r}")
+        if normalize and metric == 'haversine':
+            raise ValueError("haversine cần tọa độ (lat, lon) gốc, không chuẩn hóa")
+        coords = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+        if normalize:
+            coords = normalize_coordinates(coords)
+        self.coordinates = coords
+        self.metric = metric
+        self.n = len(coords)
+        self._dtype = np.dtype(dtype)
+        self._points = coords.tolist()
+        if metric == 'haversine':
+            self._radians = np.radians(coords).tolist()
+        self.max_cache_bytes = max_cache_bytes
+        self._row_capacity = max_cache_bytes // max(self.n * self._dtype.itemsize, 1)
+        self._rows = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._dtype
+
+    @property
+    def nbytes(self) -> int:
+        """Bộ nhớ đang dùng: tọa độ và các hàng trong bộ đệm"""
+        return self.coordinates.nbytes + len(self._rows) * self.n * self._dtype.itemsize
+
+    def item(self, i: int, j: int) -> float:
+        """Khoảng cách d(i, j) tính trực tiếp từ tọa độ, cùng công thức với pairwise_distances"""
+        if i == j:
+            return 0.0
+        if self.metric == 'haversine':
+            lat1, lon1 = self._radians[i]
+            lat2, lon2 = self._radians[j]
+            a = (math.sin((lat2 - lat1) / 2) ** 2
+                 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+            return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+        x1, y1 = self._points[i]
+        x2, y2 = self._points[j]
+        if self.metric == 'manhattan':
+            return abs(x1 - x2) + abs(y1 - y2)
+        dx, dy = x1 - x2, y1 - y2
+        return math.sqrt(dx * dx + dy * dy)
+
+    def row(self, i: int) -> np.ndarray:
+        """Hàng i (chỉ đọc), lấy từ bộ đệm hoặc tính rồi lưu lại"""
+        rows = self._rows
+        row = rows.get(i)
+        if row is not None:
+            rows.move_to_end(i)
+            self.hits += 1
+            return row
+        self.misses += 1
+        row = pairwise_distances(self.coordinates[i], self.coordinates, self.metric)[0]
+        row = row.astype(self._dtype, copy=False)
+        row.flags.writeable = False
+        if self._row_capacity > 0:
+            rows[i] = row
+            if len(rows) > self._row_capacity:
+                rows.popitem(last=False)
+        return row
+
+    def take(self, rows, columns) -> np.ndarray:
+        """Khoảng cách của các cặp (rows, columns), tính trực tiếp không qua bộ đệm"""
+        rows = np.asarray(rows, dtype=np.intp)
+        columns = np.asarray(columns, dtype=np.intp)
+        return paired_distances(self.coordinates[rows], self.coordinates[columns], self.metric)
+
+    def nearest_neighbors(self, k: int) -> np.ndarray:
+        """
+        k láng giềng gần nhất của mỗi thành phố bằng lưới ô vuông, không tính
+        khoảng cách giữa mọi cặp: mỗi thành phố chỉ xét các ô quanh nó, mở rộng
+        vòng ô cho tới khi láng giềng thứ k gần hơn mọi điểm ngoài vùng đã xét.
+        Haversine tìm trên vector đơn vị 3 chiều (khoảng cách dây cung cùng thứ
+        tự với khoảng cách trên mặt cầu).
+
+        Args:
+            k: Số láng giềng, 1 <= k < n
+
+        Returns:
+            Mảng n×k chỉ số, tăng dần theo khoảng cách
+        """
+        n = self.n
+        if self.metric == 'haversine':
+            lat, lon = np.radians(self.coordinates).T
+            points = np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon),
+                                      np.sin(lat)))
+            search_metric = 'euclidean'
+        else:
+            points, search_metric = self.coordinates, self.metric
+        low = points.min(axis=0)
+        span = points.max(axis=0) - low
+        # Khoảng 2k điểm mỗi ô khi các điểm trải đều trên một mặt 2 chiều
+        size = max(float(span.max()) / max(math.sqrt(n / (2 * k)), 1.0), 1e-12)
+        shape = tuple(int(cells) for cells in np.floor(span / size) + 1)
+        cells = np.minimum(((points - low) / size).astype(np.intp), np.array(shape) - 1)
+        keys = np.ravel_multi_index(cells.T, shape)
+        order = np.argsort(keys, kind='stable')
+        occupied, starts, counts = np.unique(keys[order], return_index=True, return_counts=True)
+        members = {key: order[start:start + count]
+                   for key, start, count in zip(occupied.tolist(), starts.tolist(), counts.tolist())}
+
+        result = np.empty((n, k), dtype=np.intp)
+        for key, queries in members.items():
+            cell = np.array(np.unravel_index(key, shape))
+            radius = 1
+            while len(queries):
+                first = np.maximum(cell - radius, 0)
+                last = np.minimum(cell + radius, np.array(shape) - 1)
+                ranges = [range(a, b + 1) for a, b in zip(first.tolist(), last.tolist())]
+                around = [members[other] for other in
+                          (int(np.ravel_multi_index(index, shape)) for index in itertools.product(*ranges))
+                          if other in members]
+                candidates = np.concatenate(around)
+                complete = (first == 0).all() and (last == np.array(shape) - 1).all()
+                if len(candidates) <= k and not complete:
+                    radius += 1
+                    continue
+                nearest, kth = _nearest_among(points, queries, candidates, k, search_metric)
+                # Khoảng cách (theo từng trục) từ điểm tới biên vùng đã xét; biên
+                # trùng biên lưới thì không còn điểm nào phía ngoài
+                lower = np.where(first > 0, low + first * size, -np.inf)
+                upper = np.where(last < np.array(shape) - 1, low + (last + 1) * size, np.inf)
+                gap = np.minimum(points[queries] - lower, upper - points[queries]).min(axis=1)
+                done = (kth <= gap) | complete
+                result[queries[done]] = nearest[done]
+                queries = queries[~done]
+                radius += 1
+
+        # Sắp xếp theo khoảng cách thật của metric
+        order = np.argsort(self.take(np.arange(n)[:, None], result), axis=1, kind='stable')
+        return np.take_along_axis(result, order, axis=1)
+
+    def cache_info(self) -> dict:
+        """Thống kê bộ đệm hàng"""
+        return {'hits': self.hits, 'misses': self.misses, 'rows': len(self._rows),
+                'capacity': self._row_capacity,
+                'bytes': len(self._rows) * self.n * self._dtype.itemsize}
+
+    def clear_cache(self):
+        self._rows.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self) -> dict:
+        # Không gửi bộ đệm sang tiến trình con
+        state = dict(self.__dict__)
+        state['_rows'] = OrderedDict()
+        return state
+
+    def __repr__(self) -> str:
+        return f"DistanceOracle(n={self.n}, metric={self.metric!r}, dtype={self._dtype})"
+
+
+class SharedArray:
+    """
+    Mảng NumPy mà nhiều tiến trình dùng chung một bản vật lý: nằm trong
+    multiprocessing.shared_memory hoặc trong file .npy ánh xạ bằng numpy.memmap.
+    Khi pickle (ví dụ gửi cho ProcessPoolExecutor) chỉ gửi tên vùng nhớ hoặc
+    đường dẫn, tiến trình con gắn lại vào cùng vùng nhớ thay vì nhận bản sao.
+    Các bộ giải nhận trực tiếp SharedArray ở chỗ nhận distance_matrix.
+    """
+
+    def __init__(self, array: np.ndarray, name: str = None, path: str = None,
+                 mode: str = 'r', memory: shared_memory.SharedMemory = None):
+        """Dùng SharedArray.create / SharedArray.open thay vì gọi trực tiếp"""
+        self.array = array
+        self.name = name
+        self.path = path
+        self.mode = mode
+        self._memory = memory
+        self._owner = False
+
+    @classmethod
+    def create(cls, array) -> 'SharedArray':
+        """Sao chép một mảng vào vùng nhớ chia sẻ mới; tiến trình tạo phải gọi unlink() khi xong"""
+        array = np.asarray(array)
+        memory = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        _ATTACHED_MEMORY[memory.name] = memory
+        view = np.ndarray(array.shape, dtype=array.dtype, buffer=memory.buf)
+        view[...] = array
+        shared = cls(view, name=memory.name, memory=memory)
+        shared._owner = True
+        return shared
+
+    @classmethod
+    def attach(cls, name: str, shape: tuple, dtype) -> 'SharedArray':
+        """Gắn vào vùng nhớ chia sẻ đã có theo tên"""
+        memory = _ATTACHED_MEMORY.get(name)
+        if memory is None:
+            try:
+                memory = shared_memory.SharedMemory(name=name, track=False)
+            except TypeError:
+                # Python < 3.13 không có track
+                memory = shared_memory.SharedMemory(name=name)
+            _ATTACHED_MEMORY[name] = memory
+        view = np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+        return cls(view, name=name, memory=memory)
+
+    @classmethod
+    def open(cls, path: str, mode: str = 'r') -> 'SharedArray':
+        """Ánh xạ file .npy (do save_array ghi) vào bộ nhớ, không đọc toàn bộ"""
+        return cls(np.load(path, mmap_mode=mode), path=os.fspath(path), mode=mode)
+
+    @property
+    def shape(self) -> tuple:
+        return self.array.shape
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.array.dtype
+
+    def __len__(self) -> int:
+        return len(self.array)
+
+    def __getitem__(self, key):
+        return self.array[key]
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        # copy=True (np.array mặc định) phải trả về bản sao: ghi vào mảng trả
+        # về không được làm hỏng bản dùng chung của mọi tiến trình
+        converts = dtype is not None and np.dtype(dtype) != self.array.dtype
+        if copy:
+            return self.array.astype(dtype if dtype is not None else self.array.dtype)
+        if converts:
+            if copy is False:
+                raise ValueError("không thể đổi kiểu SharedArray mà không sao chép")
+            return self.array.astype(dtype)
+        return self.array
+
+    def __getstate__(self) -> dict:
+        if self.name is None and self.path is None:
+            raise ValueError("SharedArray không gắn với vùng nhớ chia sẻ hay file nào")
+        return {'name': self.name, 'path': self.path, 'mode': self.mode,
+                'shape': self.array.shape, 'dtype': self.array.dtype.str}
+
+    def __setstate__(self, state: dict):
+        if state['path'] is not None:
+            shared = SharedArray.open(state['path'], 'r' if state['mode'] == 'w+' else state['mode'])
+        else:
+            shared = SharedArray.attach(state['name'], state['shape'], state['dtype'])
+        self.__dict__.update(shared.__dict__)
+
+    def close(self):
+        """Bỏ ánh xạ trong tiến trình này (mọi mảng trỏ vào vùng nhớ không dùng được nữa)"""
+        self.array = None
+        if self._memory is not None:
+            _ATTACHED_MEMORY.pop(self.name, None)
+            self._memory.close()
+
+    def unlink(self):
+        """Giải phóng vùng nhớ chia sẻ (chỉ tiến trình đã tạo gọi)"""
+        if self._memory is not None and self._owner:
+            self._memory.unlink()
+
+    def __repr__(self) -> str:
+        source = f"path={self.path!r}" if self.path is not None else f"name={self.name!r}"
+        return f"SharedArray({source}, shape={self.shape}, dtype={self.dtype})"
+
+
+def save_array(path: str, array, chunk_size: int = None) -> SharedArray:
+    """
+    Ghi ma trận khoảng cách (ndarray, DistanceContainer), danh sách ứng viên
+    hoặc dữ liệu nén ra file .npy theo từng khối hàng: nguồn tính theo yêu cầu
+    (DistanceOracle) không cần giữ cả ma trận trong bộ nhớ.
+
+    Args:
+        path: Đường dẫn file .npy
+        array: Mảng cần ghi
+        chunk_size: Số hàng mỗi khối (None: tự chọn theo DEFAULT_BLOCK_ELEMENTS)
+
+    Returns:
+        SharedArray ánh xạ (chỉ đọc) file vừa ghi
+    """
+    if isinstance(array, SharedArray):
+        array = array.array
+    elif not isinstance(array, DistanceContainer):
+        array = np.asarray(array)
+    shape = tuple(array.shape)
+    out = np.lib.format.open_memmap(path, mode='w+', dtype=array.dtype, shape=shape)
+    if chunk_size is None:
+        chunk_size = max(1, DEFAULT_BLOCK_ELEMENTS // max(int(np.prod(shape[1:])), 1))
+    for start in range(0, shape[0] if shape else 0, chunk_size):
+        stop = min(start + chunk_size, shape[0])
+        out[start:stop] = array[np.arange(start, stop)]
+    if not shape:
+        out[...] = array
+    out.flush()
+    del out
+    return SharedArray.open(path)
+
+
+def open_distances(path: str):
+    """
+    Mở ma trận khoảng cách đã lưu bằng save_array: file 1 chiều (dữ liệu của
+    CondensedDistanceMatrix) trả về CondensedDistanceMatrix trên file ánh xạ,
+    file n×n trả về SharedArray
+    """
+    shared = SharedArray.open(path)
+    if shared.array.ndim == 1:
+        # len = n(n-1)/2
+        n = int(round((1 + math.sqrt(1 + 8 * len(shared.array))) / 2))
+        return CondensedDistanceMatrix(shared, n)
+    return shared
@@ -1,10 +1,10 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext, filedialog
 import csv
-import numpy as np
 import math
 from tsp_backtracking import TSPBacktracking
 from tsp_aco import TSP_ACO
+from tsp_distance import distance_matrix
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
@@ -26,7 +26,10 @@ class TSPSimpleGUI:
         
         self.result_backtracking = None
         self.result_aco = None
+        self.bt_method = None
         self.aco_solver = None
+        # (name, coordinates) of the cities the last ACO solver was built for
+        self.aco_keys = []
         
         self.create_ui()
     
@@ -408,34 +411,8 @@ class TSPSimpleGUI:
         self.status_label.config(text=f'Generated {n} random cities')
     
     def calculate_distance_matrix(self):
-        """Calculate Euclidean distance matrix"""
-        n = len(self.cities)
-        matrix = np.zeros((n, n))
-        
-        coords = np.array(self.coordinates)
-        lat_min, lat_max = coords[:, 0].min(), coords[:, 0].max()
-        lon_min, lon_max = coords[:, 1].min(), coords[:, 1].max()
-        
-        lat_range = lat_max - lat_min if lat_max > lat_min else 1
-        lon_range = lon_max - lon_min if lon_max > lon_min else 1
-        
-        # Normalize coordinates
-        normalized = [
-            ((lat - lat_min) / lat_range * 100 if lat_range > 0 else 50,
-             (lon - lon_min) / lon_range * 100 if lon_range > 0 else 50)
-            for lat, lon in self.coordinates
-        ]
-        
-        # Calculate distances
-        for i in range(n):
-            for j in range(i + 1, n):
-                lat1, lon1 = normalized[i]
-                lat2, lon2 = normalized[j]
-                dist = np.sqrt((lat2 - lat1)**2 + (lon2 - lon1)**2)
-                matrix[i][j] = dist
-                matrix[j][i] = dist
-        
-        return matrix
+        """Calculate Euclidean distance matrix on coordinates normalized to [0, 100]"""
+        return distance_matrix(self.coordinates, normalize=True)
     
     def solve(self):
         """Solve TSP with both algorithms"""
@@ -453,9 +430,11 @@ class TSPSimpleGUI:
             alpha = float(self.param_spinboxes['Alpha:'].get())
             beta = float(self.param_spinboxes['Beta:'].get())
             
-            # Solve with Backtracking
-            bt_solver = TSPBacktracking(self.cities, self.distance_matrix)
+            # Solve with Backtracking (Held-Karp DP beyond the backtracking limit)
+            method = 'held_karp' if len(self.cities) > 15 else 'backtracking'
+            bt_solver = TSPBacktracking(self.cities, self.distance_matrix, method=method)
             self.result_backtracking = bt_solver.solve(verbose=False)
+            self.bt_method = method
             
             # Solve with ACO (use UI params including evaporation and Q)
             try:
@@ -467,12 +446,21 @@ class TSPSimpleGUI:
             except Exception:
                 q_const = 100
 
-            aco_solver = TSP_ACO(self.cities, self.distance_matrix,
-                                n_ants=n_ants, n_iterations=n_iter,
-                                alpha=alpha, beta=beta, 
-                                evaporation_rate=evaporation, q=q_const)
+            aco_params = dict(n_ants=n_ants, n_iterations=n_iter,
+                              alpha=alpha, beta=beta,
+                              evaporation_rate=evaporation, q=q_const)
+            keys = list(zip(self.cities, self.coordinates))
+            if self.aco_solver is not None:
+                # Warm start: keep pheromone and best tour for cities that are still there
+                previous = {key: index for index, key in enumerate(self.aco_keys)}
+                mapping = [previous.get(key) for key in keys]
+                aco_solver = self.aco_solver.remap(self.cities, self.distance_matrix,
+                                                   mapping=mapping, **aco_params)
+            else:
+                aco_solver = TSP_ACO(self.cities, self.distance_matrix, **aco_params)
             self.result_aco = aco_solver.solve(verbose=False)
             self.aco_solver = aco_solver
+            self.aco_keys = keys
             
             self._display_results()
             self.status_label.config(text="✓ Solved successfully")
@@ -503,7 +491,7 @@ Best Route:     {' → '.join(bt['route'])} → {bt['route'][0]}
 Total Distance: {bt['distance']:.2f} km
 Execution Time: {bt['time']:.6f} seconds
 Routes Explored: {bt['explored_routes']} paths
-Complexity:     O(n!)
+Complexity:     {'O(n² × 2ⁿ)' if self.bt_method == 'held_karp' else 'O(n!)'}
 
     ACO (Ant Colony Optimization)
 ─────────────────────────────────────────────────────────────────────
@@ -8,6 +8,7 @@ from tkinter import ttk, filedialog, messagebox, scrolledtext
 import numpy as np
 from tsp_backtracking import TSPBacktracking
 from tsp_aco import TSP_ACO
+from tsp_distance import distance_matrix, normalize_coordinates
 import csv
 import os
 import matplotlib.pyplot as plt
@@ -350,33 +351,11 @@ class TSPGUI:
         if not self.coordinates:
             return
         
-        coords = np.array(self.coordinates)
-        lat_min, lat_max = coords[:, 0].min(), coords[:, 0].max()
-        lon_min, lon_max = coords[:, 1].min(), coords[:, 1].max()
-        
-        lat_range = lat_max - lat_min if lat_max > lat_min else 1
-        lon_range = lon_max - lon_min if lon_max > lon_min else 1
-        
-        self.normalized_coordinates = [
-            ((lat - lat_min) / lat_range * 100 if lat_range > 0 else 50,
-             (lon - lon_min) / lon_range * 100 if lon_range > 0 else 50)
-            for lat, lon in self.coordinates
-        ]
+        self.normalized_coordinates = [tuple(point) for point in normalize_coordinates(self.coordinates)]
     
     def calculate_distance_matrix(self):
         """Calculate the distance matrix between cities"""
-        n = len(self.cities)
-        matrix = np.zeros((n, n))
-        
-        for i in range(n):
-            for j in range(i+1, n):
-                lat1, lon1 = self.normalized_coordinates[i]
-                lat2, lon2 = self.normalized_coordinates[j]
-                dist = np.sqrt((lat2-lat1)**2 + (lon2-lon1)**2)
-                matrix[i][j] = dist
-                matrix[j][i] = dist
-        
-        return matrix
+        return distance_matrix(self.normalized_coordinates)
     
     def solve_problem(self):
         """Solve TSP using both algorithms"""
@@ -403,7 +382,8 @@ class TSPGUI:
         self.root.update()
         
         # Solve with Backtracking
-        bt_solver = TSPBacktracking(self.cities, self.distance_matrix)
+        # Keep the first expansion steps for the details window
+        bt_solver = TSPBacktracking(self.cities, self.distance_matrix, trace_first=30)
         self.result_backtracking = bt_solver.solve(verbose=False)
         
         # Solve with ACO
@@ -0,0 +1,244 @@
+"""
+Travelling Salesman Problem - Heuristics
+Các heuristic xây dựng và cải thiện tuyến đường nhanh (không tối ưu)
+"""
+
+from collections import deque
+from typing import List
+
+
+def route_distance(route: List[int], distance_matrix) -> float:
+    """Tính tổng khoảng cách của một chu trình"""
+    total_distance = 0
+    for i in range(len(route) - 1):
+        total_distance += distance_matrix[route[i]][route[i + 1]]
+    total_distance += distance_matrix[route[-1]][route[0]]
+    return total_distance
+
+
+def rotate_to_start(route: List[int], start: int = 0) -> List[int]:
+    """Xoay chu trình để bắt đầu tại thành phố start"""
+    index = route.index(start)
+    return route[index:] + route[:index]
+
+
+def is_symmetric(distance_matrix, n: int) -> bool:
+    """Kiểm tra ma trận khoảng cách có đối xứng không"""
+    for i in range(n):
+        row = distance_matrix[i]
+        for j in range(i + 1, n):
+            if abs(row[j] - distance_matrix[j][i]) > 1e-9:
+                return False
+    return True
+
+
+def nearest_neighbor_route(distance_matrix, n: int, start: int = 0) -> List[int]:
+    """
+    Heuristic láng giềng gần nhất: luôn đi tới thành phố chưa thăm gần nhất
+
+    Args:
+        distance_matrix: Ma trận khoảng cách
+        n: Số thành phố
+        start: Thành phố xuất phát
+    """
+    route = [start]
+    unvisited = set(range(n))
+    unvisited.remove(start)
+    while unvisited:
+        row = distance_matrix[route[-1]]
+        next_city = min(unvisited, key=lambda city: row[city])
+        route.append(next_city)
+        unvisited.remove(next_city)
+    return route
+
+
+def greedy_edge_route(distance_matrix, n: int, start: int = 0) -> List[int]:
+    """
+    Heuristic cạnh tham lam: thêm lần lượt các cạnh ngắn nhất sao cho mỗi
+    thành phố có bậc tối đa 2 và không tạo chu trình con
+
+    Args:
+        distance_matrix: Ma trận khoảng cách
+        n: Số thành phố
+        start: Thành phố đầu của tuyến đường trả về
+    """
+    if n < 3:
+        return list(range(start, n)) + list(range(start))
+
+    edges = sorted(
+        (min(distance_matrix[i][j], distance_matrix[j][i]), i, j)
+        for i in range(n) for j in range(i + 1, n)
+    )
+    parent = list(range(n))
+
+    def find(city):
+        while parent[city] != city:
+            parent[city] = parent[parent[city]]
+            city = parent[city]
+        return city
+
+    degree = [0] * n
+    adjacent = [[] for _ in range(n)]
+    added = 0
+    for _, i, j in edges:
+        if degree[i] == 2 or degree[j] == 2:
+            continue
+        root_i, root_j = find(i), find(j)
+        if root_i == root_j and added < n - 1:
+            continue
+        parent[root_i] = root_j
+        degree[i] += 1
+        degree[j] += 1
+        adjacent[i].append(j)
+        adjacent[j].append(i)
+        added += 1
+        if added == n:
+            break
+
+    route = [start]
+    previous, current = None, start
+    while len(route) < n:
+        next_city = adjacent[current][0] if adjacent[current][0] != previous else adjacent[current][1]
+        route.append(next_city)
+        previous, current = current, next_city
+    return route
+
+
+def two_opt(route: List[int], distance_matrix, symmetric: bool = True) -> List[int]:
+    """
+    Cải thiện tuyến đường bằng 2-opt: đảo ngược đoạn route[i..j] khi việc
+    thay hai cạnh (a, b), (c, d) bằng (a, c), (b, d) làm tuyến ngắn hơn
+
+    Args:
+        route: Tuyến đường ban đầu
+        distance_matrix: Ma trận khoảng cách
+        symmetric: False thì tính thêm chênh lệch chi phí khi đảo chiều đoạn
+    """
+    route = route[:]
+    n = len(route)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, n - 1):
+            for j in range(i + 1, n):
+                a, b = route[i - 1], route[i]
+                c, d = route[j], route[(j + 1) % n]
+                delta = (distance_matrix[a][c] + distance_matrix[b][d]
+                         - distance_matrix[a][b] - distance_matrix[c][d])
+                if not symmetric:
+                    for k in range(i, j):
+                        delta += distance_matrix[route[k + 1]][route[k]] - distance_matrix[route[k]][route[k + 1]]
+                if delta < -1e-10:
+                    route[i:j + 1] = reversed(route[i:j + 1])
+                    improved = True
+    return route
+
+
+def local_search(route: List[int], distance_matrix, neighbors, or_opt: bool = True) -> List[int]:
+    """
+    Cải thiện tuyến đường (khoảng cách đối xứng) bằng 2-opt và Or-opt chỉ xét
+    các láng giềng gần nhất, với bit don't-look: một thành phố chỉ được xét
+    lại khi một cạnh kề nó vừa thay đổi. Chênh lệch chi phí mỗi bước tính
+    trong O(1).
+
+    Args:
+        route: Tuyến đường ban đầu
+        distance_matrix: Ma trận khoảng cách (list lồng nhau hoặc ndarray)
+        neighbors: neighbors[i] là các thành phố gần i nhất, tăng dần theo khoảng cách
+        or_opt: Thêm bước Or-opt (chuyển đoạn 1-3 thành phố tới vị trí khác)
+    """
+    n = len(route)
+    if n < 5:
+        return two_opt(route, distance_matrix)
+    if hasattr(distance_matrix, 'item'):
+        # ndarray: item(i, j) nhanh hơn nhiều so với [i][j]
+        dist = distance_matrix.item
+    else:
+        def dist(a, b):
+            return distance_matrix[a][b]
+
+    tour = list(route)
+    pos = [0] * n
+    for index, city in enumerate(tour):
+        pos[city] = index
+
+    def reverse(i, j):
+        # Đảo đoạn tour[i..j] (vòng); đảo phần bù nếu nó ngắn hơn
+        inner = (j - i) % n + 1
+        if 2 * inner > n:
+            i, j = (j + 1) % n, (i - 1) % n
+            inner = n - inner
+        for _ in range(inner // 2):
+            first, last = tour[i], tour[j]
+            tour[i], tour[j] = last, first
+            pos[last], pos[first] = i, j
+            i = (i + 1) % n
+            j = (j - 1) % n
+
+    def improve_two_opt(a):
+        for forward in (True, False):
+            i = pos[a]
+            b = tour[(i + 1) % n] if forward else tour[i - 1]
+            d_ab = dist(a, b)
+            for c in neighbors[a]:
+                d_ac = dist(a, c)
+                if d_ac >= d_ab:
+                    break
+                j = pos[c]
+                d = tour[(j + 1) % n] if forward else tour[j - 1]
+                if d == a:
+                    continue
+                if d_ac + dist(b, d) - d_ab - dist(c, d) < -1e-10:
+                    # a b ... c d -> a c ... b d (hoặc chiều ngược lại khi forward=False)
+                    if forward:
+                        reverse(pos[b], j)
+                    else:
+                        reverse(j, pos[b])
+                    return (a, b, c, d)
+        return None
+
+    def improve_or_opt(a):
+        i = pos[a]
+        for length in (1, 2, 3):
+            segment = [tour[(i + t) % n] for t in range(length)]
+            first, last = segment[0], segment[-1]
+            p, nx = tour[i - 1], tour[(i + length) % n]
+            gain = dist(p, first) + dist(last, nx) - dist(p, nx)
+            for end in (first, last):
+                for c in neighbors[end]:
+                    if dist(end, c) >= gain:
+                        break
+                    if c in segment:
+                        continue
+                    j = pos[c]
+                    for x, y in ((tour[j - 1], c), (c, tour[(j + 1) % n])):
+                        if x in segment or y in segment:
+                            continue
+                        # Chèn đoạn vào giữa x và y, giữ chiều hoặc đảo chiều
+                        for head, tail in ((first, last), (last, first)):
+                            delta = dist(x, head) + dist(tail, y) - dist(x, y) - gain
+                            if delta < -1e-10:
+                                rest = [tour[(i + length + t) % n] for t in range(n - length)]
+                                k = (pos[x] - i - length) % n
+                                moved = segment if head == first else segment[::-1]
+                                tour[:] = rest[:k + 1] + moved + rest[k + 1:]
+                                for index, city in enumerate(tour):
+                                    pos[city] = index
+                                return (p, nx, x, y, first, last)
+        return None
+
+    queue = deque(tour)
+    queued = [True] * n
+    while queue:
+        a = queue.popleft()
+        queued[a] = False
+        touched = improve_two_opt(a)
+        if touched is None and or_opt:
+            touched = improve_or_opt(a)
+        if touched is None:
+            continue
+        for city in touched + (a,):
+            if not queued[city]:
+                queued[city] = True
+                queue.append(city)
+    return tour
@@ -0,0 +1,135 @@
+"""
+Travelling Salesman Problem - Trace
+Ghi vết có cấu trúc cho các thuật toán: sự kiện dạng số trong bộ đệm vòng
+kích thước cố định, chỉ định dạng thành chuỗi khi có người đọc
+"""
+
+from array import array
+from typing import Callable, Iterator, List, Tuple
+
+TRACE_OFF = 0
+TRACE_IMPROVEMENTS = 1
+TRACE_ALL = 2
+TRACE_LEVELS = {'off': TRACE_OFF, 'improvements': TRACE_IMPROVEMENTS, 'all': TRACE_ALL}
+
+# Mã sự kiện; ý nghĩa của các trường a, b, value, extra ghi ở từng dòng
+EVENT_IMPROVEMENT = 0     # a: lần lặp (ACO) hoặc 0, value: khoảng cách mới
+EVENT_EXPAND = 1          # a: từ thành phố, b: tới thành phố, value: khoảng cách, extra: tích lũy
+EVENT_SEED = 2            # a: index phương pháp khởi tạo, value: khoảng cách
+EVENT_SUMMARY = 3         # a: số trạng thái/nút, value: khoảng cách tốt nhất
+EVENT_ITERATION = 4       # a: lần lặp, value: tốt nhất của lần lặp, extra: tốt nhất toàn cục
+
+RECORD_FIELDS = 5
+
+
+def parse_trace_level(level) -> int:
+    """Chuyển mức ghi vết dạng chuỗi ('off', 'improvements', 'all') thành số"""
+    if level in TRACE_LEVELS:
+        return TRACE_LEVELS[level]
+    if level in TRACE_LEVELS.values():
+        return level
+    raise ValueError(f"trace phải là một trong {tuple(TRACE_LEVELS)}, nhận được {level!r}")
+
+
+class TraceBuffer:
+    """
+    Bộ đệm vòng lưu các sự kiện (event, a, b, value, extra) dạng số thực, cùng
+    một vùng riêng giữ tối đa keep_first sự kiện ghi bằng record_first (ví dụ
+    các bước mở rộng đầu tiên), không bao giờ bị ghi đè
+    """
+
+    def __init__(self, capacity: int = 1024, keep_first: int = 0):
+        """
+        Args:
+            capacity: Số sự kiện gần nhất được giữ trong vòng
+            keep_first: Sức chứa của vùng sự kiện đầu tiên
+        """
+        self.capacity = capacity
+        self.keep_first = keep_first
+        self._first = array('d', bytes(8 * RECORD_FIELDS * keep_first))
+        self._data = array('d', bytes(8 * RECORD_FIELDS * capacity))
+        self._next = 0
+        self.kept = 0
+        self.total = 0
+
+    def record(self, event: int, a: int = 0, b: int = 0, value: float = 0.0, extra: float = 0.0):
+        """Ghi một sự kiện vào vòng, ghi đè sự kiện cũ nhất khi vòng đầy"""
+        offset = self._next * RECORD_FIELDS
+        data = self._data
+        data[offset] = event
+        data[offset + 1] = a
+        data[offset + 2] = b
+        data[offset + 3] = value
+        data[offset + 4] = extra
+        self._next = (self._next + 1) % self.capacity
+        self.total += 1
+
+    def record_first(self, event: int, a: int = 0, b: int = 0, value: float = 0.0,
+                     extra: float = 0.0) -> bool:
+        """Ghi một sự kiện vào vùng sự kiện đầu tiên; False (không ghi) khi vùng đã đầy"""
+        if self.kept >= self.keep_first:
+            return False
+        offset = self.kept * RECORD_FIELDS
+        data = self._first
+        data[offset] = event
+        data[offset + 1] = a
+        data[offset + 2] = b
+        data[offset + 3] = value
+        data[offset + 4] = extra
+        self.kept += 1
+        return True
+
+    def clear(self):
+        self._next = 0
+        self.kept = 0
+        self.total = 0
+
+    def __len__(self) -> int:
+        return self.kept + min(self.total, self.capacity)
+
+    def __iter__(self) -> Iterator[Tuple[int, int, int, float, float]]:
+        """Duyệt các sự kiện đầu tiên rồi các sự kiện còn trong vòng, cũ nhất trước"""
+        data = self._first
+        for k in range(self.kept):
+            offset = k * RECORD_FIELDS
+            yield (int(data[offset]), int(data[offset + 1]), int(data[offset + 2]),
+                   data[offset + 3], data[offset + 4])
+        count = min(self.total, self.capacity)
+        first = (self._next - count) % self.capacity
+        data = self._data
+        for k in range(count):
+            offset = ((first + k) % self.capacity) * RECORD_FIELDS
+            yield (int(data[offset]), int(data[offset + 1]), int(data[offset + 2]),
+                   data[offset + 3], data[offset + 4])
+
+
+class TraceSteps:
+    """
+    Danh sách log chỉ đọc, định dạng các sự kiện thành chuỗi ở lần truy cập
+    đầu tiên. Dùng được như list: len(), lặp, chỉ số và cắt lát.
+    """
+
+    def __init__(self, buffer: TraceBuffer, formatter: Callable[[tuple], str]):
+        self._buffer = buffer
+        self._formatter = formatter
+        self._lines = None
+        self._formatted_state = None
+
+    def _format(self) -> List[str]:
+        state = (self._buffer.kept, self._buffer.total)
+        if self._formatted_state != state:
+            self._lines = [self._formatter(record) for record in self._buffer]
+            self._formatted_state = state
+        return self._lines
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._format())
+
+    def __getitem__(self, index):
+        return self._format()[index]
+
+    def __repr__(self) -> str:
+        return repr(self._format())
@@ -0,0 +1,160 @@
+"""
+Travelling Salesman Problem - Verify
+Kiểm tra các cấu hình của TSPBacktracking trên bài toán nhỏ: mọi tổ hợp
+method/bound/engine/ordering/symmetry phải cho cùng độ dài với vét cạn, và
+chạy engine 'iterative' thành từng lát qua checkpoint phải cho cùng kết quả
+và cùng bộ đếm với một lần chạy liền
+"""
+
+import itertools
+import os
+import sys
+import tempfile
+from typing import List
+
+import numpy as np
+
+from tsp_backtracking import BOUNDS, ENGINES, ORDERINGS, TICK_MASK, TSPBacktracking
+from tsp_distance import distance_matrix
+from tsp_heuristics import route_distance
+
+# Sai số cho phép khi so sánh độ dài tuyến đường
+TOLERANCE = 1e-9
+
+
+def brute_force(matrix) -> float:
+    """Độ dài chu trình ngắn nhất bằng cách thử mọi hoán vị (thành phố 0 cố định)"""
+    n = len(matrix)
+    return min(route_distance([0] + list(rest), matrix) for rest in itertools.permutations(range(1, n)))
+
+
+def make_instances(max_n: int = 8, seed: int = 0) -> List[tuple]:
+    """
+    Bài toán thử: tọa độ ngẫu nhiên (ma trận đối xứng) và ma trận ngẫu nhiên
+    không đối xứng cho mỗi n từ 4 tới max_n
+
+    Returns:
+        Danh sách (tên, danh sách thành phố, ma trận khoảng cách dạng list)
+    """
+    rng = np.random.default_rng(seed)
+    instances = []
+    for n in range(4, max_n + 1):
+        cities = [f"C{i}" for i in range(n)]
+        symmetric = distance_matrix(rng.random((n, 2)) * 100)
+        asymmetric = rng.random((n, n)) * 100
+        np.fill_diagonal(asymmetric, 0.0)
+        instances.append((f"euclid-{n}", cities, symmetric.tolist()))
+        instances.append((f"asym-{n}", cities, asymmetric.tolist()))
+    return instances
+
+
+def configurations(symmetric: bool) -> List[dict]:
+    """Mọi tổ hợp tham số hợp lệ; symmetry=True chỉ đúng với ma trận đối xứng"""
+    configs = [{'method': 'held_karp'}]
+    symmetry_modes = ('auto', True, False) if symmetric else ('auto', False)
+    for bound, engine, ordering, symmetry in itertools.product(BOUNDS, ENGINES, ORDERINGS,
+                                                              symmetry_modes):
+        if ordering == 'bound' and bound is None:
+            continue
+        configs.append({'bound': bound, 'engine': engine, 'ordering': ordering,
+                        'symmetry': symmetry})
+    return configs
+
+
+def check_against_brute_force(max_n: int = 8, workers: int = 2) -> List[str]:
+    """
+    Giải mọi bài toán thử với mọi cấu hình (thêm một lần song song mỗi bài)
+    và so với vét cạn
+
+    Returns:
+        Danh sách mô tả các lỗi tìm được
+    """
+    failures = []
+    for name, cities, matrix in make_instances(max_n):
+        expected = brute_force(matrix)
+        symmetric = name.startswith('euclid')
+        runs = [(config, {}) for config in configurations(symmetric)]
+        runs.append(({}, {'workers': workers}))
+        for config, options in runs:
+            solver = TSPBacktracking(cities, matrix, trace='off', **config)
+            result = solver.solve(**options)
+            route = solver.best_route
+            label = f"{name} {config} {options}"
+            if sorted(route) != list(range(len(cities))):
+                failures.append(f"{label}: tuyến đường không phải hoán vị {route}")
+            elif abs(route_distance(route, matrix) - result['distance']) > TOLERANCE:
+                failures.append(f"{label}: độ dài tuyến {route_distance(route, matrix)} "
+                                f"khác độ dài trả về {result['distance']}")
+            elif abs(result['distance'] - expected) > TOLERANCE:
+                failures.append(f"{label}: {result['distance']} khác vét cạn {expected}")
+    return failures
+
+
+def check_checkpoint_resume(max_n: int = 8, min_slices: int = 3, max_extra: int = 10) -> List[str]:
+    """
+    Chạy engine 'iterative' thành từng lát TICK_MASK + 1 nút qua checkpoint
+    và so với một lần chạy liền: cùng độ dài, cùng số nút và cùng bộ đếm theo
+    độ sâu. Cận dưới làm cây tìm kiếm rất nhỏ, nên mỗi cấu hình dùng bài toán
+    nhỏ nhất từ max_n tới max_n + max_extra cần ít nhất min_slices lát.
+
+    Returns:
+        Danh sách mô tả các lỗi tìm được
+    """
+    failures = []
+    path = os.path.join(tempfile.mkdtemp(), 'verify.ckpt')
+    instances = [instance for instance in make_instances(max_n + max_extra)
+                 if len(instance[1]) >= max_n]
+    for kind in ('euclid', 'asym'):
+        for config in configurations(kind == 'euclid'):
+            if config.get('engine') != 'iterative':
+                continue
+            for name, cities, matrix in instances:
+                if not name.startswith(kind):
+                    continue
+                reference = TSPBacktracking(cities, matrix, trace='off', **config)
+                expected = reference.solve()
+                if expected['explored_routes'] > (min_slices - 1) * (TICK_MASK + 1):
+                    break
+            else:
+                failures.append(f"{kind} {config}: cây tìm kiếm quá nhỏ để chia {min_slices} lát")
+                continue
+            slices = 0
+            while True:
+                slices += 1
+                solver = TSPBacktracking(cities, matrix, trace='off', **config)
+                result = solver.solve(node_limit=slices * (TICK_MASK + 1), checkpoint_path=path)
+                if result['optimal']:
+                    break
+            label = f"{name} {config} ({slices} lát)"
+            if os.path.exists(path):
+                failures.append(f"{label}: checkpoint không bị xoá khi hoàn tất")
+                os.remove(path)
+            if abs(result['distance'] - expected['distance']) > TOLERANCE:
+                failures.append(f"{label}: {result['distance']} khác {expected['distance']}")
+            if result['explored_routes'] != expected['explored_routes']:
+                failures.append(f"{label}: {result['explored_routes']} nút khác "
+                                f"{expected['explored_routes']}")
+            counters = [(solver.depth_nodes, reference.depth_nodes),
+                        (solver.depth_incumbent_prunes, reference.depth_incumbent_prunes),
+                        (solver.depth_bound_prunes, reference.depth_bound_prunes),
+                        (solver.depth_symmetry_prunes, reference.depth_symmetry_prunes)]
+            if any(list(resumed) != list(uninterrupted) for resumed, uninterrupted in counters):
+                failures.append(f"{label}: bộ đếm theo độ sâu khác lần chạy liền")
+    return failures
+
+
+def main() -> int:
+    max_n = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    failures = []
+    for title, check in (("So với vét cạn", check_against_brute_force),
+                         ("Tiếp tục từ checkpoint", check_checkpoint_resume)):
+        found = check(max_n)
+        print(f"{title}: {'OK' if not found else f'{len(found)} lỗi'}")
+        for failure in found:
+            print(f"  {failure}")
+        failures.extend(found)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())